@@ -0,0 +1,205 @@
+"""
+Benchmark the cost of importing the client and server modules.
+
+Each import runs in a fresh interpreter, with its bytecode already cached,
+so the numbers include everything a short-lived job pays before it can
+send its first query. The modules of the working tree ("after") are
+compared with those of an earlier git revision ("before"), by default the
+repository's first commit, whose modules read config.ini and resolved the
+local host name at import time.
+
+The earlier revision is run from a directory holding a minimal config.ini
+so that its imports succeed; the benchmark also reports whether each
+revision can be imported without one. As the resolver is usually fast
+and cached on a development machine, the time it takes to resolve the
+local host name is reported separately: it is what "before" pays on every
+import where that lookup is slow, and "after" never pays.
+
+Usage:
+    python benchmarks/bench_import.py [--runs N] [--before REV]
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def time_import(module: str, runs: int, cwd: str,
+                source_root: str) -> List[float]:
+    """
+    Time importing a module in fresh interpreters.
+
+    Args:
+        module (str): Name of the module to import.
+        runs (int): Number of interpreters to start.
+        cwd (str): Working directory for the interpreters.
+        source_root (str): Directory the module is imported from.
+
+    Returns:
+        List[float]: Wall clock time of each run in milliseconds.
+    """
+    env = bench_environment(source_root)
+    baseline = [sys.executable, '-c', 'pass']
+    command = [sys.executable, '-c', f'import {module}']
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(baseline, cwd=cwd, env=env, check=True)
+        interpreter_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, check=True)
+        timings.append((time.perf_counter() - start) * 1000 - interpreter_ms)
+    return timings
+
+
+def bench_environment(source_root: str) -> Dict[str, str]:
+    """
+    Return the environment of the benchmarked interpreters.
+
+    Bytecode writing is enabled, so that after a first import the
+    modules are loaded from their cache as in a deployed server.
+
+    Args:
+        source_root (str): Directory the modules are imported from.
+
+    Returns:
+        Dict[str, str]: The environment variables.
+    """
+    env = dict(os.environ, PYTHONPATH=source_root)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def can_import(module: str, cwd: str, source_root: str) -> bool:
+    """
+    Check whether a module can be imported from a directory.
+
+    Args:
+        module (str): Name of the module to import.
+        cwd (str): Working directory for the interpreter.
+        source_root (str): Directory the module is imported from.
+
+    Returns:
+        bool: True if the import succeeded.
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', f'import {module}'], cwd=cwd,
+        env=bench_environment(source_root), capture_output=True, check=False)
+    return result.returncode == 0
+
+
+def time_resolver(runs: int) -> List[float]:
+    """
+    Time resolving the local host name in fresh interpreters.
+
+    Args:
+        runs (int): Number of interpreters to start.
+
+    Returns:
+        List[float]: Time of each lookup in milliseconds.
+    """
+    command = [sys.executable, '-c',
+               'import socket, time\n'
+               'start = time.perf_counter()\n'
+               'socket.gethostbyname(socket.gethostname())\n'
+               'print((time.perf_counter() - start) * 1000)']
+    return [float(subprocess.run(command, check=True, capture_output=True,
+                                 text=True).stdout)
+            for _ in range(runs)]
+
+
+def first_commit() -> str:
+    """
+    Return the first commit of the repository.
+
+    Returns:
+        str: The commit hash.
+    """
+    output = subprocess.run(
+        ['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPO_ROOT,
+        check=True, capture_output=True, text=True).stdout
+    return output.split()[-1]
+
+
+def export_revision(revision: str, directory: str) -> None:
+    """
+    Write the 'webserver' package at a git revision, and a configuration
+    it can import with, into a directory.
+
+    Args:
+        revision (str): The git revision to export.
+        directory (str): Destination directory.
+
+    Returns:
+        None
+    """
+    archive = subprocess.run(
+        ['git', 'archive', '--format=tar', revision, 'webserver'],
+        cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    with open(os.path.join(directory, 'config.ini'), 'w',
+              encoding='utf-8') as config_file:
+        config_file.write("[Server]\n"
+                          "linuxpath = 200k.txt\n"
+                          "sslcert = cert.pem\n"
+                          "sslkey = key.pem\n"
+                          "REREAD_ON_QUERY = False\n")
+
+
+def main() -> None:
+    """
+    Run the benchmark and print a before/after comparison.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--before', help='git revision to compare against '
+                        '(default: the first commit)')
+    args = parser.parse_args()
+    before = args.before or first_commit()
+    print(f'before: {before}, after: working tree, '
+          f'median over the bare interpreter ({args.runs} runs)')
+    with tempfile.TemporaryDirectory() as before_dir, \
+            tempfile.TemporaryDirectory() as empty_dir:
+        export_revision(before, before_dir)
+        for module in ('webserver.client', 'webserver.server'):
+            # Write the bytecode caches before timing
+            time_import(module, 1, before_dir, before_dir)
+            time_import(module, 1, empty_dir, REPO_ROOT)
+            before_timings: List[float] = []
+            after_timings: List[float] = []
+            # Alternate so both sides see the same background load
+            for _ in range(args.runs):
+                before_timings += time_import(module, 1, before_dir,
+                                              before_dir)
+                after_timings += time_import(module, 1, empty_dir, REPO_ROOT)
+            before_ms = statistics.median(before_timings)
+            after_ms = statistics.median(after_timings)
+            print(f'import {module:<17} before {before_ms:6.1f}ms  '
+                  f'after {after_ms:6.1f}ms  '
+                  f'change {after_ms - before_ms:+6.1f}ms')
+        for module in ('webserver.client', 'webserver.server'):
+            # The revision's own directory holds the config.ini it needs
+            before_ok = can_import(module, empty_dir, before_dir)
+            after_ok = can_import(module, empty_dir, REPO_ROOT)
+            print(f'import {module:<17} without config.ini: '
+                  f"before {'ok' if before_ok else 'fails'}, "
+                  f"after {'ok' if after_ok else 'fails'}")
+    resolver_ms = statistics.median(time_resolver(args.runs))
+    print(f'resolve local host name {resolver_ms:6.1f}ms '
+          '(paid by every "before" import, not by "after")')
+
+
+if __name__ == '__main__':
+    main()
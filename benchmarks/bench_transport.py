@@ -0,0 +1,250 @@
+"""
+Benchmark query latency and throughput over each transport.
+
+Starts a server with a small indexed file, listening on both TCP and a
+Unix domain socket, and measures:
+
+* latency: round trips of one query at a time over a single connection;
+* throughput: queries per second from several concurrent connections.
+
+The server is run once without SSL, measuring the Unix socket and
+loopback TCP, and once with SSL, measuring TLS over loopback TCP. The
+SSL run needs the 'openssl' command to create a self-signed certificate
+and is skipped without it.
+
+Usage:
+    python benchmarks/bench_transport.py [--queries N] [--clients N]
+"""
+import argparse
+import os
+import shutil
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+Connector = Callable[[], socket.socket]
+
+
+def free_port() -> int:
+    """
+    Return a TCP port that is currently free on the loopback interface.
+
+    Returns:
+        int: The port number.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        port: int = probe.getsockname()[1]
+        return port
+
+
+def start_server(directory: str, port: int, use_ssl: bool
+                 ) -> subprocess.Popen:  # type: ignore[type-arg]
+    """
+    Write a configuration and start a server process using it.
+
+    Args:
+        directory (str): Directory for the configuration and data files.
+        port (int): TCP port for the server.
+        use_ssl (bool): Whether the server wraps TCP connections in SSL.
+
+    Returns:
+        subprocess.Popen: The running server process.
+    """
+    data_path = os.path.join(directory, 'data.txt')
+    with open(data_path, 'w', encoding='utf-8') as data_file:
+        data_file.write(''.join(f'line {number}\n' for number in range(100)))
+    config_path = os.path.join(directory, 'config.ini')
+    with open(config_path, 'w', encoding='utf-8') as config_file:
+        config_file.write(
+            "[Server]\n"
+            "host = 127.0.0.1\n"
+            f"port = {port}\n"
+            f"unix_socket_path = {os.path.join(directory, 'ws.sock')}\n"
+            f"linuxpath = {data_path}\n"
+            f"sslcert = {os.path.join(directory, 'cert.pem')}\n"
+            f"sslkey = {os.path.join(directory, 'key.pem')}\n"
+            f"ssl = {use_ssl}\n"
+            "WATCH_FILE = True\n"
+            "max_connections = 0\n"
+            "max_connections_per_ip = 0\n")
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'webserver.server', '--config', config_path],
+        env=env, stdout=subprocess.DEVNULL)
+    # The Unix socket is published once the TCP socket is listening
+    unix_path = os.path.join(directory, 'ws.sock')
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if os.path.exists(unix_path):
+            return process
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError('Server did not start')
+
+
+def stop_server(process: subprocess.Popen) -> None:  # type: ignore[type-arg]
+    """
+    Stop a server process started by 'start_server'.
+
+    Args:
+        process (subprocess.Popen): The server process.
+
+    Returns:
+        None
+    """
+    process.terminate()
+    process.wait(30)
+
+
+def measure_latency(connect: Connector, queries: int) -> List[float]:
+    """
+    Time sequential queries over one connection.
+
+    Args:
+        connect (Connector): Opens a connection to the server.
+        queries (int): Number of queries to send.
+
+    Returns:
+        List[float]: Round trip time of each query in microseconds.
+    """
+    timings = []
+    with connect() as client:
+        for number in range(queries):
+            start = time.perf_counter()
+            client.sendall(f'line {number % 100}'.encode())
+            client.recv(1024)
+            timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def measure_throughput(connect: Connector, queries: int,
+                       clients: int) -> float:
+    """
+    Measure queries per second from concurrent connections.
+
+    Args:
+        connect (Connector): Opens a connection to the server.
+        queries (int): Number of queries each client sends.
+        clients (int): Number of concurrent connections.
+
+    Returns:
+        float: Queries answered per second.
+    """
+    connections = [connect() for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def run(client: socket.socket) -> None:
+        barrier.wait()
+        for number in range(queries):
+            client.sendall(f'line {number % 100}'.encode())
+            client.recv(1024)
+
+    threads = [threading.Thread(target=run, args=(client,))
+               for client in connections]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for client in connections:
+        client.close()
+    return queries * clients / elapsed
+
+
+def report(name: str, connect: Connector, queries: int,
+           clients: int) -> Dict[str, float]:
+    """
+    Measure one transport and print its results.
+
+    Args:
+        name (str): Name of the transport.
+        connect (Connector): Opens a connection to the server.
+        queries (int): Number of queries per measurement.
+        clients (int): Number of concurrent connections for throughput.
+
+    Returns:
+        Dict[str, float]: Median and 99th percentile latency and QPS.
+    """
+    latencies = sorted(measure_latency(connect, queries))
+    result = {
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'qps': measure_throughput(connect, queries, clients),
+    }
+    print(f'{name:<12} p50 {result["p50"]:8.1f}us  '
+          f'p99 {result["p99"]:8.1f}us  {result["qps"]:10.0f} qps')
+    return result
+
+
+def main() -> None:
+    """
+    Run the benchmark for each transport and print a comparison.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        port = free_port()
+        unix_path = os.path.join(directory, 'ws.sock')
+        server = start_server(directory, port, use_ssl=False)
+        try:
+            def connect_unix() -> socket.socket:
+                client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                client.connect(unix_path)
+                return client
+
+            results['unix'] = report('unix', connect_unix,
+                                     args.queries, args.clients)
+            results['tcp'] = report(
+                'tcp', lambda: socket.create_connection(('127.0.0.1', port)),
+                args.queries, args.clients)
+        finally:
+            stop_server(server)
+
+        if shutil.which('openssl'):
+            subprocess.run(
+                ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                 '-subj', '/CN=localhost', '-days', '1',
+                 '-keyout', os.path.join(directory, 'key.pem'),
+                 '-out', os.path.join(directory, 'cert.pem')],
+                check=True, capture_output=True)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            port = free_port()
+            server = start_server(directory, port, use_ssl=True)
+            try:
+                results['tls'] = report(
+                    'tcp+tls', lambda: context.wrap_socket(
+                        socket.create_connection(('127.0.0.1', port))),
+                    args.queries, args.clients)
+            finally:
+                stop_server(server)
+        else:
+            print('tcp+tls      skipped: openssl not found')
+
+    for name in ('tcp', 'tls'):
+        if name in results:
+            latency_ratio = results[name]['p50'] / results['unix']['p50']
+            print(f'unix vs {name}: {latency_ratio:.2f}x lower p50 latency, '
+                  f'{results["unix"]["qps"] / results[name]["qps"]:.2f}x QPS')
+
+
+if __name__ == '__main__':
+    main()
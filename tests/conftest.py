@@ -0,0 +1,31 @@
+"""
+Shared pytest fixtures for the webserver tests.
+"""
+
+from typing import Iterator
+import pytest
+from webserver import server
+from webserver.settings import Settings, configure
+
+
+@pytest.fixture(autouse=True)
+def settings() -> Iterator[Settings]:
+    """
+    Install known settings for each test instead of reading config.ini.
+
+    Yields:
+        Settings: The settings in use for the test.
+    """
+    test_settings = Settings(host='127.0.0.1', port=12345,
+                             linuxpath='/nonexistent/200k.txt',
+                             sslcert='cert.pem', sslkey='key.pem',
+                             metrics_interval=0)
+    configure(test_settings)
+    server.connection_limiter = None
+    server.rate_limiter = None
+    server.connection_tracker = server.ConnectionTracker()
+    yield test_settings
+    configure(None)
+    server.connection_limiter = None
+    server.rate_limiter = None
+    server.connection_tracker = server.ConnectionTracker()
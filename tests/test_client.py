@@ -9,14 +9,17 @@ reconnect, and managed_socket_connection.
 
 import sys
 import os
+import subprocess
+from pathlib import Path
 import socket
 from unittest.mock import patch, call
 from webserver.client import (send_request, connect_to_server, reconnect,
-                              managed_socket_connection, SERVER_HOST,
-                              SERVER_PORT, sslcert, sslkey)
+                              managed_socket_connection)
+from webserver.settings import Settings, configure
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 
 def test_send_request() -> None:
@@ -43,44 +46,41 @@ def test_send_request() -> None:
             mock_client_socket.recv.assert_called_once_with(1024)
 
 
-def test_connect_to_server_with_ssl() -> None:
+def test_connect_to_server_with_ssl(settings: Settings) -> None:
     """
     Test the connect_to_server function with SSL.
     """
-    with patch('webserver.client.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = True
-        with patch('webserver.client.ssl.SSLContext') as mock_ssl_context:
-            mock_context = mock_ssl_context.return_value
-            with patch('webserver.client.socket.socket') as mock_socket:
-                wrap_socket_return = mock_socket.return_value
-                mock_context.wrap_socket.return_value = wrap_socket_return
-                result = connect_to_server()
-                assert result == wrap_socket_return
-                assert mock_socket.call_count == 2
-                mock_socket.assert_any_call(
-                    socket.AF_INET, socket.SOCK_STREAM)
-                wrap_socket_return.connect.assert_called_once_with(
-                    (SERVER_HOST, SERVER_PORT))
-                mock_context.load_cert_chain.assert_called_once_with(
-                    sslcert, sslkey)
-                mock_context.wrap_socket.assert_called_once_with(
-                    mock_socket.return_value, server_side=False)
-
-
-def test_connect_to_server_without_ssl() -> None:
-    """
-    Test the connect_to_server function without SSL.
-    """
-    with patch('webserver.client.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = False
+    configure(settings._replace(client_ssl=True))
+    with patch('webserver.client.ssl.SSLContext') as mock_ssl_context:
+        mock_context = mock_ssl_context.return_value
         with patch('webserver.client.socket.socket') as mock_socket:
-            mock_client_socket = mock_socket.return_value
+            wrap_socket_return = mock_socket.return_value
+            mock_context.wrap_socket.return_value = wrap_socket_return
             result = connect_to_server()
-            assert result == mock_client_socket
-            mock_socket.assert_called_once_with(
+            assert result == wrap_socket_return
+            assert mock_socket.call_count == 2
+            mock_socket.assert_any_call(
                 socket.AF_INET, socket.SOCK_STREAM)
-            mock_client_socket.connect.assert_called_once_with(
-                (SERVER_HOST, SERVER_PORT))
+            wrap_socket_return.connect.assert_called_once_with(
+                (settings.host, settings.port))
+            mock_context.load_cert_chain.assert_called_once_with(
+                settings.sslcert, settings.sslkey)
+            mock_context.wrap_socket.assert_called_once_with(
+                mock_socket.return_value, server_side=False)
+
+
+def test_connect_to_server_without_ssl(settings: Settings) -> None:
+    """
+    Test the connect_to_server function without SSL.
+    """
+    with patch('webserver.client.socket.socket') as mock_socket:
+        mock_client_socket = mock_socket.return_value
+        result = connect_to_server()
+        assert result == mock_client_socket
+        mock_socket.assert_called_once_with(
+            socket.AF_INET, socket.SOCK_STREAM)
+        mock_client_socket.connect.assert_called_once_with(
+            (settings.host, settings.port))
 
 
 def test_reconnect_success() -> None:
@@ -118,3 +118,58 @@ def test_managed_socket_connection() -> None:
             mock_connect_to_server.assert_called_once()
             mock_close_client_socket.assert_called_once_with(
                 'mock client socket')
+
+
+def test_import_without_config_or_dns(tmp_path: Path) -> None:
+    """
+    Test that importing the client needs neither config.ini nor DNS.
+
+    The import runs in a fresh interpreter from an empty directory with
+    host name resolution disabled, so it fails if the module reads its
+    configuration or resolves the local host name at import time.
+    """
+    code = (
+        "import socket\n"
+        "def fail(*args):\n"
+        "    raise AssertionError('DNS lookup at import time')\n"
+        "socket.gethostbyname = fail\n"
+        "socket.gethostname = fail\n"
+        "import webserver.client, webserver.server\n"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    env.pop('WEBSERVER_CONFIG', None)
+    subprocess.run([sys.executable, '-c', code], cwd=str(tmp_path), env=env,
+                   check=True)
+
+
+def test_connect_to_server_prefers_unix_socket(tmp_path: Path,
+                                               settings: Settings) -> None:
+    """
+    Test that connect_to_server uses the Unix socket when it exists.
+    """
+    socket_path = str(tmp_path / 'ws.sock')
+    configure(settings._replace(unix_socket_path=socket_path))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(socket_path)
+        listener.listen()
+        client_socket = connect_to_server()
+        try:
+            assert client_socket.family == socket.AF_UNIX
+            assert client_socket.getpeername() == socket_path
+        finally:
+            client_socket.close()
+
+
+def test_connect_to_server_without_unix_socket(tmp_path: Path,
+                                               settings: Settings) -> None:
+    """
+    Test that connect_to_server uses TCP when the Unix socket is missing.
+    """
+    configure(settings._replace(
+        unix_socket_path=str(tmp_path / 'missing.sock')))
+    with patch('webserver.client.socket.socket') as mock_socket:
+        connect_to_server()
+        mock_socket.assert_called_once_with(
+            socket.AF_INET, socket.SOCK_STREAM)
+        mock_socket.return_value.connect.assert_called_once_with(
+            (settings.host, settings.port))
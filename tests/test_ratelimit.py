@@ -0,0 +1,205 @@
+"""
+This module contains test functions for the webserver.ratelimit module.
+
+The functions in this module test the functionality of the RateLimiter
+class and the load_rate_limiter function, including per-network overrides.
+"""
+
+import configparser
+import ipaddress
+from typing import List
+import pytest
+from webserver.ratelimit import RateLimiter, load_rate_limiter
+
+
+class FakeClock:
+    """A manually advanced clock for deterministic bucket refills."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter_allows_burst_then_refills() -> None:
+    """
+    Test that a client can spend its burst and then earns tokens back.
+
+    Returns:
+        None
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    results: List[bool] = [limiter.allow('10.0.0.1') for _ in range(4)]
+    assert results == [True, True, True, False]
+    assert limiter.allow('10.0.0.2')
+    clock.now = 0.5
+    assert limiter.allow('10.0.0.1')
+    assert not limiter.allow('10.0.0.1')
+
+
+def test_rate_limiter_disabled() -> None:
+    """
+    Test that a rate of 0 without overrides never limits queries.
+
+    Returns:
+        None
+    """
+    limiter = RateLimiter(rate=0, burst=0)
+    assert all(limiter.allow('10.0.0.1') for _ in range(1000))
+
+
+def test_rate_limiter_overrides() -> None:
+    """
+    Test that the most specific matching network override applies.
+
+    Returns:
+        None
+    """
+    limiter = RateLimiter(
+        rate=1, burst=1,
+        overrides=[(ipaddress.ip_network('10.0.0.0/8'), 5, 5),
+                   (ipaddress.ip_network('10.1.0.0/16'), 0, 0)],
+        clock=FakeClock())
+    assert limiter.limits_for('10.2.3.4') == (5, 5)
+    assert limiter.limits_for('10.1.2.3') == (0, 0)
+    assert limiter.limits_for('192.0.2.1') == (1, 1)
+    assert limiter.limits_for('not an ip') == (1, 1)
+    assert all(limiter.allow('10.1.2.3') for _ in range(100))
+    assert limiter.allow('192.0.2.1')
+    assert not limiter.allow('192.0.2.1')
+
+
+def test_rate_limiter_unix_clients_use_loopback_overrides() -> None:
+    """
+    Test that Unix domain socket clients get the loopback overrides.
+
+    This test verifies that a client identified by user ID is limited
+    like a client connecting over loopback TCP, so exempting the local
+    host also exempts local clients using the Unix domain socket.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string(
+        "[RateLimit]\n"
+        "rate = 1\n"
+        "[RateLimitOverrides]\n"
+        "local = 127.0.0.0/8 0\n")
+    limiter = load_rate_limiter(config)
+    assert limiter.limits_for('unix:0') == limiter.limits_for('127.0.0.1')
+    assert limiter.limits_for('unix') == (0, 1)
+    assert all(limiter.allow('unix:1000') for _ in range(100))
+    ipv6_limiter = RateLimiter(
+        rate=1, burst=1, overrides=[(ipaddress.ip_network('::1/128'), 5, 5)])
+    assert ipv6_limiter.limits_for('unix:0') == (5, 5)
+    assert RateLimiter(rate=1, burst=1).limits_for('unix:0') == (1, 1)
+
+
+def test_rate_limiter_prunes_full_buckets() -> None:
+    """
+    Test that idle buckets are dropped once a shard reaches its size cap.
+
+    Returns:
+        None
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, shards=1,
+                          max_buckets_per_shard=2, clock=clock)
+    assert limiter.allow('10.0.0.1')
+    assert limiter.allow('10.0.0.2')
+    clock.now = 10.0
+    assert limiter.allow('10.0.0.3')
+    assert limiter.allow('10.0.0.1')
+
+
+def test_load_rate_limiter() -> None:
+    """
+    Test building a RateLimiter from configuration sections.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string(
+        "[RateLimit]\n"
+        "rate = 20\n"
+        "burst = 40\n"
+        "[RateLimitOverrides]\n"
+        "batch = 10.1.0.0/16 2\n"
+        "local = ::1/128 0\n")
+    limiter = load_rate_limiter(config)
+    assert limiter.limits_for('192.0.2.1') == (20, 40)
+    assert limiter.limits_for('10.1.0.7') == (2, 2)
+    assert limiter.limits_for('::1') == (0, 1)
+    assert load_rate_limiter(configparser.ConfigParser()).rate == 0
+
+
+def test_load_rate_limiter_with_invalid_override() -> None:
+    """
+    Test that a malformed override entry raises a ValueError.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string("[RateLimitOverrides]\nbad = 10.0.0.0/8\n")
+    with pytest.raises(ValueError):
+        load_rate_limiter(config)
+
+
+def test_load_rate_limiter_with_fractional_rate() -> None:
+    """
+    Test that rates below one query per second still admit queries.
+
+    This test verifies that without a configured burst, a fractional
+    default or override rate gets a bucket of one query, refilled at the
+    configured rate.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string(
+        "[RateLimit]\n"
+        "rate = 0.5\n"
+        "[RateLimitOverrides]\n"
+        "slow = 10.0.0.0/8 0.25\n")
+    limiter = load_rate_limiter(config)
+    assert limiter.limits_for('192.0.2.1') == (0.5, 1)
+    assert limiter.limits_for('10.0.0.1') == (0.25, 1)
+    clock = FakeClock()
+    limiter._clock = clock
+    assert limiter.allow('192.0.2.1')
+    assert not limiter.allow('192.0.2.1')
+    clock.now = 2.0
+    assert limiter.allow('192.0.2.1')
+    assert limiter.allow('10.0.0.1')
+    clock.now = 5.0
+    assert not limiter.allow('10.0.0.1')
+    clock.now = 6.0
+    assert limiter.allow('10.0.0.1')
+
+
+@pytest.mark.parametrize('section', [
+    "[RateLimit]\nrate = -1\n",
+    "[RateLimit]\nrate = 10\nburst = 0.5\n",
+    "[RateLimitOverrides]\nbad = 10.0.0.0/8 -1\n",
+    "[RateLimitOverrides]\nbad = 10.0.0.0/8 5 0\n",
+])
+def test_load_rate_limiter_with_invalid_limits(section: str) -> None:
+    """
+    Test that negative rates and bursts below 1 raise a ValueError.
+
+    Args:
+        section: Configuration with an invalid rate or burst.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string(section)
+    with pytest.raises(ValueError):
+        load_rate_limiter(config)
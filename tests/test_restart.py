@@ -0,0 +1,260 @@
+"""
+This module contains test functions for the webserver.restart module.
+
+The functions in this module test handing the listening socket to a
+replacement process and waiting for it to report that it is ready.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import pytest
+from webserver.restart import (LISTEN_FD_ENV, READY_FD_ENV,
+                               inherited_listening_socket, is_replacement,
+                               notify_ready, spawn_replacement)
+
+# Replacement that checks it inherited the socket, then reports ready
+READY_SCRIPT = (
+    "from webserver.restart import inherited_listening_socket, notify_ready\n"
+    "sock = inherited_listening_socket()\n"
+    "assert sock.getsockname()[1] > 0\n"
+    "notify_ready()\n"
+)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def listening_socket(monkeypatch: pytest.MonkeyPatch
+                     ) -> Iterator[socket.socket]:
+    """
+    Provide a listening socket, with the package importable by children.
+
+    Args:
+        monkeypatch: Pytest fixture for changing the environment.
+
+    Yields:
+        socket.socket: A socket listening on a free loopback port.
+    """
+    monkeypatch.setenv('PYTHONPATH', REPO_ROOT)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+    yield sock
+    sock.close()
+
+
+def test_spawn_replacement_ready(listening_socket: socket.socket) -> None:
+    """
+    Test that a replacement which reports ready is accepted.
+
+    Args:
+        listening_socket: A socket listening on a free loopback port.
+
+    Returns:
+        None
+    """
+    assert spawn_replacement(listening_socket.fileno(), 30,
+                             [sys.executable, '-c', READY_SCRIPT])
+
+
+def test_spawn_replacement_failed(listening_socket: socket.socket) -> None:
+    """
+    Test that a replacement which exits before it is ready is rejected.
+
+    Args:
+        listening_socket: A socket listening on a free loopback port.
+
+    Returns:
+        None
+    """
+    assert not spawn_replacement(listening_socket.fileno(), 30,
+                                 [sys.executable, '-c', 'pass'])
+
+
+def test_not_a_replacement(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that a normally started process neither inherits nor notifies.
+
+    Args:
+        monkeypatch: Pytest fixture for changing the environment.
+
+    Returns:
+        None
+    """
+    monkeypatch.delenv(LISTEN_FD_ENV, raising=False)
+    monkeypatch.delenv(READY_FD_ENV, raising=False)
+    assert inherited_listening_socket() is None
+    assert not is_replacement()
+    notify_ready()
+
+
+def wait_for_server(port: int, timeout: float = 30) -> bool:
+    """
+    Wait until a server accepts connections on a loopback port.
+
+    Args:
+        port: The server's TCP port.
+        timeout: Maximum seconds to wait.
+
+    Returns:
+        bool: Whether the server accepted a connection in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def start_test_server(tmp_path: Path
+                      ) -> Tuple['subprocess.Popen[bytes]', int]:
+    """
+    Start a server process on a free port, watching a 2000 line file.
+
+    The server runs in a session of its own, so 'stop_process_group' also
+    stops any replacement it starts.
+
+    Args:
+        tmp_path: Directory for the configuration, data and log files.
+
+    Returns:
+        Tuple[subprocess.Popen, int]: The server process and its port.
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text(''.join(f'line {number}\n'
+                                 for number in range(2000)))
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    config_file = tmp_path / 'config.ini'
+    config_file.write_text(
+        "[Server]\n"
+        "host = 127.0.0.1\n"
+        f"port = {port}\n"
+        f"linuxpath = {data_file}\n"
+        "WATCH_FILE = True\n"
+        "metrics_interval = 0\n")
+    with open(tmp_path / 'server.log', 'w', encoding='utf-8') as log_file:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'webserver.server',
+             '--config', str(config_file)],
+            env=dict(os.environ, PYTHONPATH=REPO_ROOT), stdout=log_file,
+            stderr=subprocess.STDOUT, start_new_session=True)
+    return server, port
+
+
+def stop_process_group(process: subprocess.Popen,  # type: ignore[type-arg]
+                       timeout: float = 30) -> None:
+    """
+    Stop a process started in its own session, and everything it started.
+
+    Args:
+        process: The session leader.
+        timeout: Seconds to wait after SIGTERM before using SIGKILL.
+
+    Returns:
+        None
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        while time.monotonic() < deadline:
+            process.poll()
+            os.killpg(process.pid, 0)
+            time.sleep(0.05)
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR2'),
+                    reason='hot restart needs SIGUSR2')
+def test_hot_restart_under_load(tmp_path: Path) -> None:
+    """
+    Test that a hot restart does not refuse or drop any query.
+
+    This test starts a server with the default connection caps and a
+    watched 2000 line file, sends SIGUSR2 while a client sends queries
+    back to back on a new connection each, and checks that every query
+    before, during and after the handover is answered.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    server, port = start_test_server(tmp_path)
+    responses: Dict[bytes, int] = {}
+    try:
+        assert wait_for_server(port)
+        signalled = False
+        handed_over_at: Optional[float] = None
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < 60:
+            if not signalled and time.monotonic() - start_time > 0.5:
+                os.kill(server.pid, signal.SIGUSR2)
+                signalled = True
+            # Carry on for a second after the old process has exited
+            if handed_over_at is None and server.poll() is not None:
+                handed_over_at = time.monotonic()
+            elif (handed_over_at is not None
+                  and time.monotonic() - handed_over_at > 1):
+                break
+            try:
+                with socket.create_connection(('127.0.0.1', port),
+                                              timeout=10) as client:
+                    client.sendall(b'line 7')
+                    response = client.recv(1024)
+            except OSError as query_error:
+                response = repr(query_error).encode()
+            responses[response] = responses.get(response, 0) + 1
+    finally:
+        stop_process_group(server)
+    assert server.returncode == 0
+    assert list(responses) == [b'STRING EXISTS\n'], responses
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR2'),
+                    reason='hot restart needs SIGUSR2')
+def test_signals_during_drain(tmp_path: Path) -> None:
+    """
+    Test that repeated signals do not kill a draining server.
+
+    This test sends SIGTERM while a connection waits for its first
+    query, then SIGUSR2 and SIGTERM again during the drain, and checks
+    that the query is still answered and the server exits cleanly.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    server, port = start_test_server(tmp_path)
+    try:
+        assert wait_for_server(port)
+        with socket.create_connection(('127.0.0.1', port),
+                                      timeout=10) as client:
+            # Let the server accept the connection before stopping
+            time.sleep(0.2)
+            os.kill(server.pid, signal.SIGTERM)
+            time.sleep(1)
+            os.kill(server.pid, signal.SIGUSR2)
+            os.kill(server.pid, signal.SIGTERM)
+            time.sleep(0.2)
+            client.sendall(b'line 7')
+            assert client.recv(1024) == b'STRING EXISTS\n'
+        assert server.wait(30) == 0
+    finally:
+        stop_process_group(server)
@@ -6,21 +6,35 @@ in the webserver.server module, including start_server,
 handle_client_connection, read_file, and linuxpath.
 """
 
+import configparser
 import sys
 import os
+import select
 import socket
 import ssl
-from unittest.mock import Mock, patch, MagicMock
+import stat
+import threading
+import time
+from unittest.mock import Mock, patch, MagicMock, call
 from pathlib import Path
 import pytest
 from webserver.server import (read_file, handle_client_connection,
-                              start_server, linuxpath, SERVER_HOST,
-                              SERVER_PORT, sslkey, sslcert)
+                              start_server, ConnectionLimiter,
+                              ConnectionTracker, ServerShutdown,
+                              _listen_unix, _close_unix,
+                              _accept_unix_connections, log_metrics,
+                              _log_metrics_periodically)
+from webserver.metrics import ServerMetrics
+from webserver.ratelimit import RateLimiter
+from webserver.settings import Settings, configure
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 12345
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
-def test_start_server() -> None:
+def test_start_server(settings: Settings) -> None:
     """
     Test starting the server and listening for client connections.
 
@@ -31,6 +45,9 @@ def test_start_server() -> None:
     is that the appropriate functions are called to start the server
     and listen for connections.
 
+    Args:
+        settings: The settings installed for the test.
+
     Returns:
         None
     """
@@ -39,8 +56,8 @@ def test_start_server() -> None:
     mock_socket.listen.return_value = None
     mock_socket.accept.side_effect = KeyboardInterrupt
 
-    with patch('webserver.server.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = True
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        mock_get_settings.return_value = settings._replace(server_ssl=True)
         with patch('webserver.server.socket.socket', return_value=mock_socket):
             with patch('webserver.server.ssl.create_default_context'
                        ) as mock_create_default_context:
@@ -52,7 +69,7 @@ def test_start_server() -> None:
                     assert not mock_thread.called
 
 
-def test_start_server_with_ssl() -> None:
+def test_start_server_with_ssl(settings: Settings) -> None:
     """
     Test starting the server with SSL.
 
@@ -62,11 +79,14 @@ def test_start_server_with_ssl() -> None:
     behavior is that the appropriate functions are called to start
     the server with SSL.
 
+    Args:
+        settings: The settings installed for the test.
+
     Returns:
         None
     """
-    with patch('webserver.server.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = True
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        mock_get_settings.return_value = settings._replace(server_ssl=True)
         with patch(
             'webserver.server.ssl.create_default_context'
         ) as mock_create_default_context:
@@ -82,16 +102,16 @@ def test_start_server_with_ssl() -> None:
                 mock_socket.return_value.bind.return_value = None
                 mock_socket.return_value.listen.return_value = None
                 start_server()
-                mock_getboolean.assert_called_once_with('Server', 'ssl')
                 mock_create_default_context.assert_called_once_with(
                     ssl.Purpose.CLIENT_AUTH)
                 mock_context.load_cert_chain.assert_called_once_with(
-                    certfile=sslcert, keyfile=sslkey)
+                    certfile=settings.sslcert, keyfile=settings.sslkey)
                 mock_context.wrap_socket.assert_called_once_with(
-                    mock_socket.return_value, server_side=True)
+                    mock_socket.return_value, server_side=True,
+                    do_handshake_on_connect=False)
 
 
-def test_start_server_with_client_connection() -> None:
+def test_start_server_with_client_connection(settings: Settings) -> None:
     """
     Test starting the server with a client connection.
 
@@ -101,6 +121,9 @@ def test_start_server_with_client_connection() -> None:
     The expected behavior is that a new thread is created and the
     handle_client_connection function is called.
 
+    Args:
+        settings: The settings installed for the test.
+
     Returns:
         None
     """
@@ -108,10 +131,13 @@ def test_start_server_with_client_connection() -> None:
     mock_socket = MagicMock()
     mock_socket.bind.return_value = None
     mock_socket.listen.return_value = None
-    mock_socket.accept.side_effect = [(None, None), KeyboardInterrupt]
+    mock_socket.accept.side_effect = [
+        (MagicMock(), (SERVER_HOST, SERVER_PORT)), KeyboardInterrupt]
 
-    with patch('webserver.server.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = True
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        # The mocked handler thread never finishes the connection
+        mock_get_settings.return_value = settings._replace(
+            server_ssl=True, drain_timeout=0)
         with patch('webserver.server.socket.socket', return_value=mock_socket):
             with patch('webserver.server.ssl.create_default_context'
                        ) as mock_create_default_context:
@@ -127,7 +153,7 @@ def test_start_server_with_client_connection() -> None:
                         assert not mock_handle_client_connection.called
 
 
-def test_start_server_with_socket_error() -> None:
+def test_start_server_with_socket_error(settings: Settings) -> None:
     """
     Test starting the server with a socket error.
 
@@ -136,11 +162,14 @@ def test_start_server_with_socket_error() -> None:
     the necessary functions and simulate the socket error. The expected
     behavior is that the error message is printed to the console.
 
+    Args:
+        settings: The settings installed for the test.
+
     Returns:
         None
     """
-    with patch('webserver.server.config.getboolean') as mock_getboolean:
-        mock_getboolean.return_value = False
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        mock_get_settings.return_value = settings
         with patch('webserver.server.socket.socket') as mock_socket:
             mock_socket.side_effect = socket.error('test error')
             with patch('builtins.print') as mock_print:
@@ -192,7 +221,8 @@ def test_handle_client_connection_with_string_found() -> None:
                 mock_socket.send.assert_called_with(b'STRING EXISTS\n')
 
 
-def test_handle_client_connection_with_file_not_found() -> None:
+def test_handle_client_connection_with_file_not_found(
+        settings: Settings) -> None:
     """
     Test handle_client_connection function with a file not found error.
 
@@ -201,6 +231,9 @@ def test_handle_client_connection_with_file_not_found() -> None:
     mock the necessary functions and checks if the appropriate error
     message is printed to the console and the socket is closed.
 
+    Args:
+        settings: The settings installed for the test.
+
     Returns:
         None
     """
@@ -211,7 +244,7 @@ def test_handle_client_connection_with_file_not_found() -> None:
                 handle_client_connection(mock_socket, (SERVER_HOST,
                                                        SERVER_PORT))
                 mock_print.assert_called_once_with(
-                    'File not found:', linuxpath)
+                    'File not found:', settings.linuxpath)
                 mock_socket.close.assert_called_once()
 
 
@@ -261,3 +294,520 @@ def test_handle_client_connection_with_socket_error() -> None:
                                                        SERVER_PORT))
                 mock_print.assert_called_once_with(
                     'Error receiving or sending data: test error')
+
+
+def test_handle_client_connection_with_idle_timeout() -> None:
+    """
+    Test handle_client_connection closing an idle connection.
+
+    This test verifies that a client which sends a query and then stays
+    silent past the idle timeout is disconnected, and that the closure
+    is counted under the 'idle_timeout' reason.
+
+    Returns:
+        None
+    """
+    with patch('webserver.server.read_file') as mock_read_file:
+        mock_read_file.return_value = {'test string': [0]}
+        with patch('webserver.server.metrics', ServerMetrics()) as metrics:
+            client_socket = Mock()
+            client_socket.recv.side_effect = [b'test string',
+                                              socket.timeout]
+            handle_client_connection(client_socket,
+                                     (SERVER_HOST, SERVER_PORT))
+            client_socket.close.assert_called_once()
+            assert metrics.get('connections_closed.idle_timeout') == 1
+
+
+def test_handle_client_connection_with_slow_client() -> None:
+    """
+    Test handle_client_connection closing a client that never sends a query.
+
+    This test verifies that a client which connects but does not send
+    its first query within the query timeout is disconnected without a
+    response, and that the closure is counted under 'slow_client'.
+
+    Returns:
+        None
+    """
+    with patch('webserver.server.read_file') as mock_read_file:
+        mock_read_file.return_value = {'test string': [0]}
+        with patch('webserver.server.metrics', ServerMetrics()) as metrics:
+            client_socket = Mock()
+            client_socket.recv.side_effect = socket.timeout
+            handle_client_connection(client_socket,
+                                     (SERVER_HOST, SERVER_PORT))
+            client_socket.send.assert_not_called()
+            client_socket.close.assert_called_once()
+            assert metrics.get('connections_closed.slow_client') == 1
+
+
+def test_connection_limiter() -> None:
+    """
+    Test the ConnectionLimiter global and per-IP caps.
+
+    This test verifies that connections are rejected once the per-IP or
+    global cap is reached, and admitted again after a slot is released.
+
+    Returns:
+        None
+    """
+    limiter = ConnectionLimiter(max_total=3, max_per_ip=2)
+    assert limiter.acquire('10.0.0.1') is None
+    assert limiter.acquire('10.0.0.1') is None
+    assert limiter.acquire('10.0.0.1') == 'per_ip_limit'
+    assert limiter.acquire('10.0.0.2') is None
+    assert limiter.acquire('10.0.0.3') == 'global_limit'
+    limiter.release('10.0.0.1')
+    assert limiter.open_connections() == 2
+    assert limiter.acquire('10.0.0.3') is None
+
+
+@pytest.mark.skipif(not hasattr(select, 'POLLRDHUP'),
+                    reason='hang-ups are detected with POLLRDHUP')
+def test_connection_limiter_reclaims_closed_connections() -> None:
+    """
+    Test that a slot held for a client that hung up is reused.
+
+    This test verifies that when a cap is reached, the slots of clients
+    that have closed their end are freed without waiting for 'release',
+    and that the later 'release' of such a connection frees nothing.
+
+    Returns:
+        None
+    """
+    limiter = ConnectionLimiter(max_total=0, max_per_ip=1)
+    first_server, first_client = socket.socketpair()
+    second_server, second_client = socket.socketpair()
+    try:
+        assert limiter.acquire('10.0.0.1', first_server) is None
+        assert limiter.acquire('10.0.0.1', second_server) == 'per_ip_limit'
+        first_client.close()
+        assert limiter.acquire('10.0.0.1', second_server) is None
+        limiter.release('10.0.0.1', first_server)
+        assert limiter.open_connections() == 1
+        assert limiter.acquire('10.0.0.1') == 'per_ip_limit'
+    finally:
+        for end in (first_server, second_server, second_client):
+            end.close()
+
+
+def test_start_server_rejects_connection_over_limit(
+        settings: Settings) -> None:
+    """
+    Test starting the server when the connection limit is reached.
+
+    This test verifies that start_server answers a connection over the
+    limit with 'SERVER BUSY', closes it without starting a handler
+    thread, and counts the closure under the limit that rejected it.
+
+    Args:
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    mock_socket = MagicMock()
+    mock_client_socket = MagicMock()
+    mock_socket.accept.side_effect = [
+        (mock_client_socket, (SERVER_HOST, SERVER_PORT)), KeyboardInterrupt]
+
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        mock_get_settings.return_value = settings
+        with patch('webserver.server.socket.socket', return_value=mock_socket):
+            with patch('webserver.server.connection_limiter',
+                       ConnectionLimiter(max_total=1, max_per_ip=0)
+                       ) as limiter:
+                limiter.acquire('192.0.2.1')
+                with patch('webserver.server.metrics',
+                           ServerMetrics()) as metrics:
+                    with patch('webserver.server.threading.Thread'
+                               ) as mock_thread:
+                        start_server()
+                        assert not mock_thread.called
+                        mock_client_socket.send.assert_called_once_with(
+                            b'SERVER BUSY\n')
+                        mock_client_socket.close.assert_called_once()
+                        assert metrics.get(
+                            'connections_closed.global_limit') == 1
+
+
+def test_handle_client_connection_with_rate_limit() -> None:
+    """
+    Test handle_client_connection with a client over its rate limit.
+
+    This test verifies that once the client's token bucket is empty, the
+    query is answered with 'RATE LIMITED' instead of a search result and
+    the rejection is counted in the server metrics.
+
+    Returns:
+        None
+    """
+    with patch('webserver.server.read_file') as mock_read_file:
+        mock_read_file.return_value = {'test string': [0]}
+        with patch('webserver.server.rate_limiter',
+                   RateLimiter(rate=1, burst=1)):
+            with patch('webserver.server.metrics',
+                       ServerMetrics()) as metrics:
+                client_socket = Mock()
+                client_socket.recv.side_effect = [b'test string',
+                                                  b'test string', b'']
+                handle_client_connection(client_socket,
+                                         (SERVER_HOST, SERVER_PORT))
+                sent = [args[0][0] for args
+                        in client_socket.send.call_args_list]
+                assert sent == [b'STRING EXISTS\n', b'RATE LIMITED\n']
+                assert metrics.get('queries_rate_limited') == 1
+
+
+def test_handle_client_connection_with_watched_file() -> None:
+    """
+    Test handle_client_connection with the file watched in the background.
+
+    This test verifies that queries are answered from the watcher's
+    current index, picking up a newly published index between queries,
+    without reading the file on the request path.
+
+    Returns:
+        None
+    """
+    watcher = MagicMock()
+    watcher.index = {'old string': [0]}
+    received = iter([b'old string', b'new string', b''])
+
+    def receive(_: int) -> bytes:
+        data = next(received)
+        if data == b'new string':
+            # The watcher publishes a new index between the two queries
+            watcher.index = {'new string': [0]}
+        return data
+
+    client_socket = Mock()
+    client_socket.recv.side_effect = receive
+    with patch('webserver.server.index_watcher', watcher):
+        with patch('webserver.server.read_file') as mock_read_file:
+            handle_client_connection(client_socket,
+                                     (SERVER_HOST, SERVER_PORT))
+            assert not mock_read_file.called
+    sent = [args[0][0] for args in client_socket.send.call_args_list]
+    assert sent == [b'STRING EXISTS\n', b'STRING EXISTS\n']
+
+
+def test_connection_tracker_drain() -> None:
+    """
+    Test draining idle and busy connections.
+
+    This test verifies that draining shuts down idle connections at once,
+    waits for busy connections until the deadline, force-closes those
+    still open, and refuses connections registered while draining.
+
+    Returns:
+        None
+    """
+    tracker = ConnectionTracker()
+    idle_socket = MagicMock()
+    busy_socket = MagicMock()
+    assert tracker.register(idle_socket)
+    assert tracker.register(busy_socket)
+    # New connections stay busy until they finish their first query
+    tracker.mark_idle(idle_socket)
+    with patch('webserver.server.socket.socket.shutdown') as mock_shutdown:
+        forced = tracker.drain(0.01)
+        assert forced == 2
+        mock_shutdown.assert_any_call(idle_socket, socket.SHUT_RD)
+        mock_shutdown.assert_any_call(busy_socket, socket.SHUT_RDWR)
+        assert call(busy_socket, socket.SHUT_RD) not in (
+            mock_shutdown.call_args_list)
+    assert not tracker.mark_idle(busy_socket)
+    assert not tracker.register(MagicMock())
+
+
+def test_connection_tracker_drain_waits_for_busy_connection() -> None:
+    """
+    Test that draining returns as soon as busy connections finish.
+
+    Returns:
+        None
+    """
+    tracker = ConnectionTracker()
+    busy_socket = MagicMock()
+    tracker.register(busy_socket)
+    tracker.mark_busy(busy_socket)
+    finisher = threading.Timer(0.05, tracker.unregister, args=(busy_socket,))
+    finisher.start()
+    assert tracker.drain(5) == 0
+    assert tracker.open_connections() == 0
+
+
+def test_handle_client_connection_while_draining() -> None:
+    """
+    Test that a connection is closed after its query once draining starts.
+
+    Returns:
+        None
+    """
+    tracker = ConnectionTracker()
+    client_socket = Mock()
+    tracker.register(client_socket)
+
+    def receive(_: int) -> bytes:
+        tracker.draining = True
+        return b'test string'
+
+    client_socket.recv.side_effect = receive
+    with patch('webserver.server.connection_tracker', tracker):
+        with patch('webserver.server.read_file') as mock_read_file:
+            mock_read_file.return_value = {'test string': [0]}
+            with patch('webserver.server.metrics',
+                       ServerMetrics()) as metrics:
+                handle_client_connection(client_socket,
+                                         (SERVER_HOST, SERVER_PORT))
+                assert metrics.get('connections_closed.shutdown') == 1
+    client_socket.send.assert_called_once_with(b'STRING EXISTS\n')
+    assert client_socket.recv.call_count == 1
+
+
+def test_start_server_drains_on_shutdown(settings: Settings) -> None:
+    """
+    Test that start_server drains connections when asked to stop.
+
+    Args:
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    mock_socket = MagicMock()
+    mock_socket.accept.side_effect = ServerShutdown
+    with patch('webserver.server.socket.socket', return_value=mock_socket):
+        with patch('webserver.server.ConnectionTracker') as mock_tracker:
+            mock_tracker.return_value.drain.return_value = 0
+            start_server()
+            mock_socket.close.assert_called_once()
+            mock_tracker.return_value.drain.assert_called_once_with(
+                settings.drain_timeout)
+
+
+def test_unix_socket_serves_queries(tmp_path: Path,
+                                    settings: Settings) -> None:
+    """
+    Test answering queries over the Unix domain socket.
+
+    This test verifies that the Unix domain socket is created with the
+    configured permissions, serves the same protocol as TCP, identifies
+    clients by user for the connection limits, and is removed on close.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text('test string\n')
+    socket_path = str(tmp_path / 'ws.sock')
+    limiter = ConnectionLimiter(max_total=0, max_per_ip=1)
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        mock_get_settings.return_value = settings._replace(
+            linuxpath=str(data_file))
+        unix_socket, inode = _listen_unix(socket_path, 0o600)
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        stopping = threading.Event()
+        accept_thread = threading.Thread(target=_accept_unix_connections,
+                                         args=(unix_socket, limiter, stopping))
+        accept_thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                client.sendall(b'test string')
+                assert client.recv(1024) == b'STRING EXISTS\n'
+                # The connection holds this user's only slot
+                assert (limiter.acquire(f'unix:{os.getuid()}')
+                        == 'per_ip_limit')
+        finally:
+            stopping.set()
+            _close_unix(unix_socket, socket_path, inode)
+            accept_thread.join(5)
+    assert not accept_thread.is_alive()
+    assert not os.path.exists(socket_path)
+
+
+def test_close_unix_keeps_replaced_socket(tmp_path: Path) -> None:
+    """
+    Test that closing a Unix socket leaves a newer server's socket alone.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    socket_path = str(tmp_path / 'ws.sock')
+    old_socket, old_inode = _listen_unix(socket_path, 0o600)
+    new_socket, new_inode = _listen_unix(socket_path, 0o600)
+    _close_unix(old_socket, socket_path, old_inode)
+    assert os.path.exists(socket_path)
+    _close_unix(new_socket, socket_path, new_inode)
+    assert not os.path.exists(socket_path)
+
+
+@pytest.mark.parametrize('error, reason', [
+    (socket.timeout, 'slow_client'),
+    (ssl.SSLError('bad handshake'), 'handshake_failed'),
+])
+def test_handle_client_connection_with_failed_handshake(
+        error: Exception, reason: str) -> None:
+    """
+    Test handle_client_connection when the SSL handshake does not complete.
+
+    This test verifies that the handshake runs in the handler rather than
+    in accept, and that a client which stalls or fails it is closed
+    without any query being read.
+
+    Args:
+        error: The exception raised by the handshake.
+        reason: The close reason expected in the metrics.
+
+    Returns:
+        None
+    """
+    client_socket = MagicMock(spec=ssl.SSLSocket)
+    client_socket.do_handshake.side_effect = error
+    with patch('webserver.server.metrics', ServerMetrics()) as metrics:
+        with patch('builtins.print'):
+            handle_client_connection(client_socket,
+                                     (SERVER_HOST, SERVER_PORT))
+        assert metrics.get(f'connections_closed.{reason}') == 1
+    client_socket.recv.assert_not_called()
+    client_socket.close.assert_called_once()
+
+
+def test_start_server_survives_accept_error(settings: Settings) -> None:
+    """
+    Test that an error accepting one connection does not stop the server.
+
+    Args:
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    mock_socket = MagicMock()
+    mock_socket.accept.side_effect = [
+        ConnectionAbortedError('bad client'),
+        (MagicMock(), (SERVER_HOST, SERVER_PORT)), KeyboardInterrupt]
+    with patch('webserver.server.get_settings') as mock_get_settings:
+        # The mocked handler thread never finishes the connection
+        mock_get_settings.return_value = settings._replace(drain_timeout=0)
+        with patch('webserver.server.socket.socket', return_value=mock_socket):
+            with patch('webserver.server.threading.Thread') as mock_thread:
+                with patch('webserver.server.metrics',
+                           ServerMetrics()) as metrics:
+                    with patch('builtins.print') as mock_print:
+                        start_server()
+                        mock_print.assert_any_call(
+                            'Error accepting connection: bad client')
+                    assert metrics.get('accept_errors') == 1
+                assert mock_thread.called
+
+
+def test_log_metrics() -> None:
+    """
+    Test logging the metrics, once and periodically until stopped.
+
+    Returns:
+        None
+    """
+    metrics = ServerMetrics()
+    metrics.record_close('idle_timeout')
+    metrics.set_gauge('index_reload_seconds', 0.25)
+    with patch('webserver.server.metrics', metrics):
+        with patch('builtins.print') as mock_print:
+            log_metrics()
+            line = mock_print.call_args[0][0]
+            assert line.startswith(
+                'METRICS: connections_closed.idle_timeout=1, '
+                'index_reload_seconds=0.25, open_connections=0, ')
+            stopping = threading.Event()
+            reporter = threading.Thread(target=_log_metrics_periodically,
+                                        args=(0.01, stopping))
+            reporter.start()
+            time.sleep(0.1)
+            stopping.set()
+            reporter.join(5)
+            assert mock_print.call_count > 2
+
+
+def test_start_server_with_invalid_rate_limit(settings: Settings) -> None:
+    """
+    Test that an invalid rate limit configuration fails at startup.
+
+    This test verifies that start_server builds its limiters before it
+    listens, so a malformed override raises instead of breaking every
+    connection's handler thread.
+
+    Args:
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    config = configparser.ConfigParser()
+    config.read_string("[RateLimitOverrides]\nbad = 10.0.0.0/8\n")
+    configure(settings._replace(config=config))
+    with patch('webserver.server.socket.socket') as mock_socket:
+        with pytest.raises(ValueError):
+            start_server()
+        mock_socket.assert_not_called()
+
+
+def test_unix_accept_survives_client_errors(tmp_path: Path,
+                                            settings: Settings) -> None:
+    """
+    Test that a failure setting up one connection does not stop accepting.
+
+    This test verifies that when a Unix socket client cannot be
+    identified, the error is logged and counted, its connection is
+    closed, and the next client is still served.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        settings: The settings installed for the test.
+
+    Returns:
+        None
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text('test string\n')
+    socket_path = str(tmp_path / 'ws.sock')
+    limiter = ConnectionLimiter(max_total=0, max_per_ip=0)
+    with patch('webserver.server.get_settings') as mock_get_settings, \
+            patch('webserver.server.metrics', ServerMetrics()) as metrics, \
+            patch('webserver.server._unix_peer_address',
+                  side_effect=[OSError('peer gone'), ('unix:0', 0)]), \
+            patch('builtins.print') as mock_print:
+        mock_get_settings.return_value = settings._replace(
+            linuxpath=str(data_file))
+        unix_socket, inode = _listen_unix(socket_path, 0o600)
+        stopping = threading.Event()
+        accept_thread = threading.Thread(target=_accept_unix_connections,
+                                         args=(unix_socket, limiter, stopping))
+        accept_thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(5)
+                client.connect(socket_path)
+                assert client.recv(1024) == b''
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(5)
+                client.connect(socket_path)
+                client.sendall(b'test string')
+                assert client.recv(1024) == b'STRING EXISTS\n'
+        finally:
+            stopping.set()
+            _close_unix(unix_socket, socket_path, inode)
+            accept_thread.join(5)
+    assert not accept_thread.is_alive()
+    assert metrics.get('accept_errors') == 1
+    mock_print.assert_any_call('Error identifying client: peer gone')
@@ -0,0 +1,123 @@
+"""
+This module contains test functions for the webserver.settings module.
+
+The functions in this module test how load_settings combines the
+configuration file, environment variables and explicit arguments, and
+how the cached settings are installed from the command line.
+"""
+
+from pathlib import Path
+import pytest
+from webserver.settings import (load_settings, get_settings,
+                                configure_from_args)
+
+
+def write_config(tmp_path: Path) -> str:
+    """
+    Write a configuration file for the tests.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        str: Path of the configuration file.
+    """
+    config_file = tmp_path / 'config.ini'
+    config_file.write_text(
+        "[Server]\n"
+        "host = 10.0.0.5\n"
+        "port = 2000\n"
+        "linuxpath = /srv/200k.txt\n"
+        "ssl = True\n"
+        "REREAD_ON_QUERY = True\n"
+        "idle_timeout = 30\n"
+        "unix_socket_path = /run/webserver.sock\n"
+        "unix_socket_mode = 600\n"
+        "[Client]\n"
+        "ssl = False\n")
+    return str(config_file)
+
+
+def test_load_settings_from_file(tmp_path: Path,
+                                 monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test reading settings from a configuration file.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        monkeypatch: Pytest fixture for changing the environment.
+
+    Returns:
+        None
+    """
+    monkeypatch.delenv('WEBSERVER_HOST', raising=False)
+    monkeypatch.delenv('WEBSERVER_PORT', raising=False)
+    monkeypatch.delenv('WEBSERVER_UNIX_SOCKET', raising=False)
+    settings = load_settings(write_config(tmp_path))
+    assert (settings.host, settings.port) == ('10.0.0.5', 2000)
+    assert settings.linuxpath == '/srv/200k.txt'
+    assert settings.server_ssl and not settings.client_ssl
+    assert settings.reread_on_query
+    assert settings.idle_timeout == 30
+    assert settings.unix_socket_path == '/run/webserver.sock'
+    assert settings.unix_socket_mode == 0o600
+    assert settings.max_connections == 256
+
+
+def test_load_settings_precedence(tmp_path: Path,
+                                  monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that arguments override the environment, which overrides the file.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        monkeypatch: Pytest fixture for changing the environment.
+
+    Returns:
+        None
+    """
+    config_path = write_config(tmp_path)
+    monkeypatch.setenv('WEBSERVER_HOST', '10.0.0.6')
+    monkeypatch.setenv('WEBSERVER_PORT', '3000')
+    settings = load_settings(config_path)
+    assert (settings.host, settings.port) == ('10.0.0.6', 3000)
+    settings = load_settings(config_path, host='10.0.0.7', port=4000)
+    assert (settings.host, settings.port) == ('10.0.0.7', 4000)
+
+
+def test_load_settings_without_config(tmp_path: Path,
+                                      monkeypatch: pytest.MonkeyPatch
+                                      ) -> None:
+    """
+    Test that a missing configuration file falls back to the defaults.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        monkeypatch: Pytest fixture for changing the environment.
+
+    Returns:
+        None
+    """
+    monkeypatch.delenv('WEBSERVER_PORT', raising=False)
+    monkeypatch.setenv('WEBSERVER_HOST', '127.0.0.1')
+    settings = load_settings(str(tmp_path / 'missing.ini'))
+    assert settings.port == 12345
+    assert not settings.server_ssl
+
+
+def test_configure_from_args(tmp_path: Path) -> None:
+    """
+    Test installing settings from command line arguments.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    settings = configure_from_args(
+        'test', ['--config', write_config(tmp_path), '--host', '10.0.0.8',
+                 '--port', '5000'])
+    assert get_settings() is settings
+    assert (settings.host, settings.port) == ('10.0.0.8', 5000)
+    assert settings.linuxpath == '/srv/200k.txt'
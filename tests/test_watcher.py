@@ -0,0 +1,152 @@
+"""
+This module contains test functions for the webserver.watcher module.
+
+The functions in this module test that IndexWatcher publishes a new
+index when the watched file changes, keeps the old index when a reload
+fails, and picks up changes from its background thread.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+import pytest
+from webserver.metrics import ServerMetrics
+from webserver.server import read_file
+from webserver.watcher import IndexWatcher
+
+
+def rewrite(path: Path, text: str) -> None:
+    """
+    Replace a file's contents and move its modification time forward.
+
+    Args:
+        path: The file to rewrite.
+        text: The new contents.
+
+    Returns:
+        None
+    """
+    path.write_text(text)
+    modified = path.stat().st_mtime + 10
+    os.utime(path, (modified, modified))
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    """
+    Poll a condition until it holds or the timeout expires.
+
+    Args:
+        condition: Callable returning True once the wait is over.
+        timeout: Maximum seconds to wait.
+
+    Returns:
+        bool: Whether the condition held before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_check_reloads_changed_file(tmp_path: Path) -> None:
+    """
+    Test that check publishes a new index only when the file changed.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text('first\n')
+    metrics = ServerMetrics()
+    watcher = IndexWatcher(str(data_file), read_file, metrics=metrics)
+    watcher.reload()
+    old_index = watcher.index
+    assert old_index == {'first': [0]}
+    assert 'index_staleness_seconds' not in metrics.snapshot()
+    assert not watcher.check()
+    rewrite(data_file, 'second\n')
+    assert watcher.check()
+    assert watcher.index == {'second': [0]}
+    assert old_index == {'first': [0]}
+    assert metrics.get('index_reloads') == 2
+    assert 'index_reload_seconds' in metrics.snapshot()
+    assert 'index_staleness_seconds' in metrics.snapshot()
+
+
+def test_check_keeps_index_when_file_missing(tmp_path: Path) -> None:
+    """
+    Test that a failed reload leaves the current index in place.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text('first\n')
+    metrics = ServerMetrics()
+    watcher = IndexWatcher(str(data_file), read_file, metrics=metrics)
+    watcher.reload()
+    data_file.unlink()
+    assert not watcher.check()
+    assert watcher.index == {'first': [0]}
+    assert metrics.get('index_reload_errors') == 1
+
+
+@pytest.mark.parametrize('use_inotify, interval', [
+    # Polling every 30 seconds would miss the change, so this only
+    # passes if the inotify event triggers the reload
+    pytest.param(True, 30.0, marks=pytest.mark.skipif(
+        not sys.platform.startswith('linux'), reason='inotify is Linux only')),
+    (False, 0.05),
+])
+def test_background_thread_reloads(tmp_path: Path, use_inotify: bool,
+                                   interval: float) -> None:
+    """
+    Test that the background thread notices changes to the file.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+        use_inotify: Whether the watcher may use inotify.
+        interval: Seconds between status checks without notifications.
+
+    Returns:
+        None
+    """
+    data_file = tmp_path / 'data.txt'
+    data_file.write_text('first\n')
+    watcher = IndexWatcher(str(data_file), read_file, interval=interval,
+                           use_inotify=use_inotify)
+    watcher.start()
+    try:
+        assert watcher.index == {'first': [0]}
+        rewrite(data_file, 'second\n')
+        assert wait_for(lambda: watcher.index == {'second': [0]})
+    finally:
+        start_time = time.monotonic()
+        watcher.stop()
+        # Stopping does not wait for the interval to expire
+        assert time.monotonic() - start_time < 5
+
+
+def test_start_fails_without_file(tmp_path: Path) -> None:
+    """
+    Test that starting the watcher on a missing file raises an error.
+
+    Args:
+        tmp_path: A temporary directory provided by the pytest framework.
+
+    Returns:
+        None
+    """
+    watcher = IndexWatcher(str(tmp_path / 'missing.txt'), read_file)
+    with pytest.raises(FileNotFoundError):
+        watcher.start()
@@ -2,20 +2,37 @@
 This module provides client-side functionality for connecting to a server,
 sending requests, and managing socket connections.
 """
+import os
 import socket
 import ssl
-import configparser
 import time
 from typing import Optional, Generator
 from contextlib import contextmanager
+from webserver.settings import configure_from_args, get_settings
 
-config = configparser.ConfigParser()
-config.read("config.ini")
-sslcert = config.get("Server", "sslcert")
-sslkey = config.get("Server", "sslkey")
 
-SERVER_HOST = socket.gethostbyname(socket.gethostname())
-SERVER_PORT = 12345
+def _connect_unix(path: str) -> Optional[socket.socket]:
+    """
+    Connects to the server's Unix domain socket if it is available.
+
+    Args:
+        path (str): Path of the server's Unix domain socket.
+
+    Returns:
+        Optional[socket.socket]: The connected socket, or None if the
+        socket does not exist or refuses the connection.
+    """
+    if not path or not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client_socket.connect(path)
+    except socket.error as connection_error:
+        client_socket.close()
+        print(f"Unix socket error: {connection_error}, using TCP instead.")
+        return None
+    print("[*] Connected to the server over a Unix socket.")
+    return client_socket
 
 
 # function that creates a gateway to the server
@@ -24,30 +41,35 @@ def connect_to_server() -> socket.socket:
     Connects to the server and returns the client socket.
 
     This function establishes a connection to the server using a socket.
-    If SSL is enabled, it creates an SSL context, loads the certificate
-    chain, and performs an SSL handshake with the server. If SSL is not
-    enabled, it connects to the server without SSL.
+    If the server's Unix domain socket exists on this host, it is used
+    without SSL. Otherwise, if SSL is enabled, it creates an SSL context,
+    loads the certificate chain, and performs an SSL handshake with the
+    server. If SSL is not enabled, it connects to the server without SSL.
 
     Returns:
         socket.socket: The client socket connected to the server.
     """
 
+    settings = get_settings()
+    unix_socket = _connect_unix(settings.unix_socket_path)
+    if unix_socket is not None:
+        return unix_socket
+    server_address = (settings.host, settings.port)
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    use_ssl = config.getboolean('Client', 'ssl')
-    if use_ssl:
+    if settings.client_ssl:
         # Create an SSL context
         client_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
         client_context.check_hostname = False
         client_context.verify_mode = ssl.CERT_NONE
 
         # Send our generated certificate chain during the handshake
-        client_context.load_cert_chain(sslcert, sslkey)
+        client_context.load_cert_chain(settings.sslcert, settings.sslkey)
 
         # Connect to the server
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             client_socket = client_context.wrap_socket(sock, server_side=False)
-            client_socket.connect((SERVER_HOST, SERVER_PORT))
+            client_socket.connect(server_address)
             print("[*] Connected to the server with SSL.")
 
         except (socket.error,
@@ -58,7 +80,7 @@ def connect_to_server() -> socket.socket:
     else:
         # Connect to the server without SSL
         try:
-            client_socket.connect((SERVER_HOST, SERVER_PORT))
+            client_socket.connect(server_address)
             print("[*] Connected to the server without SSL.")
         except socket.error as connection_error:
             print("Socket error:", connection_error)
@@ -169,5 +191,16 @@ def send_request() -> None:
                 break
 
 
-if __name__ == '__main__':
+def main() -> None:
+    """
+    Command line entry point for the interactive client.
+
+    Returns:
+        None
+    """
+    configure_from_args('Query a string lookup server interactively.')
     send_request()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+This module provides the counters and gauges the server records about
+its activity.
+"""
+import threading
+from typing import Dict
+
+
+class ServerMetrics:
+    """
+    Thread-safe counters and gauges describing server activity.
+
+    Metrics are created on first use, so callers can record any event
+    by name without registering it up front. Counters accumulate, while
+    gauges hold the most recently observed value.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        Increase the named counter.
+
+        Args:
+            name (str): Name of the counter.
+            amount (int): Value to add to the counter.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Record the latest value of the named gauge.
+
+        Args:
+            name (str): Name of the gauge.
+            value (float): The observed value.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def record_close(self, reason: str) -> None:
+        """
+        Count a closed client connection under the given reason.
+
+        Args:
+            reason (str): Why the connection was closed.
+
+        Returns:
+            None
+        """
+        self.increment(f'connections_closed.{reason}')
+
+    def get(self, name: str) -> int:
+        """
+        Return the current value of the named counter.
+
+        Args:
+            name (str): Name of the counter.
+
+        Returns:
+            int: The counter value, 0 if it was never incremented.
+        """
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_gauge(self, name: str) -> float:
+        """
+        Return the latest value of the named gauge.
+
+        Args:
+            name (str): Name of the gauge.
+
+        Returns:
+            float: The gauge value, 0.0 if it was never set.
+        """
+        with self._lock:
+            return self._gauges.get(name, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return a copy of all counters and gauges.
+
+        Returns:
+            Dict[str, float]: Metric names mapped to their values.
+        """
+        with self._lock:
+            values: Dict[str, float] = dict(self._counters)
+            values.update(self._gauges)
+            return values
+
+    def format(self) -> str:
+        """
+        Render all counters and gauges as one log line.
+
+        Returns:
+            str: 'name=value' pairs sorted by name and separated by commas.
+        """
+        return ', '.join(f'{name}={value:g}' if isinstance(value, float)
+                         else f'{name}={value}'
+                         for name, value in sorted(self.snapshot().items()))
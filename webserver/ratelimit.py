@@ -0,0 +1,273 @@
+"""
+This module provides per-client-IP rate limiting for the server using
+token buckets, with optional overrides for individual networks.
+"""
+import configparser
+import threading
+import time
+from typing import (TYPE_CHECKING, Callable, Dict, List, Optional, Sequence,
+                    Tuple, Union)
+
+if TYPE_CHECKING:
+    # ipaddress is imported where it is used, as only limiters with
+    # overrides need it and importing it slows down importing the server
+    import ipaddress
+    IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+    IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# What Unix domain socket clients match in the overrides
+_LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class TokenBucket:
+    """
+    A token bucket refilled at a constant rate up to a maximum size.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (float): Maximum number of tokens the bucket can hold.
+        now (float): Current clock reading; the bucket starts full.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        """
+        Add the tokens earned since the last update.
+
+        Args:
+            now (float): Current clock reading.
+
+        Returns:
+            None
+        """
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def consume(self, now: float) -> bool:
+        """
+        Take one token from the bucket if one is available.
+
+        Args:
+            now (float): Current clock reading.
+
+        Returns:
+            bool: True if a token was taken, False if the bucket is empty.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _Shard:
+    """A group of buckets guarded by a single lock."""
+
+    __slots__ = ('lock', 'buckets')
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, TokenBucket] = {}
+
+
+class RateLimiter:
+    """
+    Per-IP token bucket rate limiter.
+
+    Buckets are spread over a fixed number of shards, each with its own
+    lock, so concurrent clients rarely wait on one another. The limits
+    for an IP address are resolved once, when its bucket is created, from
+    the most specific matching override or the default limits.
+
+    Args:
+        rate (float): Default queries per second per IP, 0 for no limit.
+        burst (float): Default bucket size per IP.
+        overrides (Sequence[Tuple[IPNetwork, float, float]]): Networks
+            with their own rate and burst.
+        shards (int): Number of independently locked bucket groups.
+        max_buckets_per_shard (int): Bucket count above which a shard
+            drops buckets that have refilled completely.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+    """
+
+    def __init__(self, rate: float, burst: float,
+                 overrides: 'Sequence[Tuple[IPNetwork, float, float]]' = (),
+                 shards: int = 16, max_buckets_per_shard: int = 4096,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        # Most specific networks first so the first match wins
+        self.overrides: 'List[Tuple[IPNetwork, float, float]]' = sorted(
+            overrides, key=lambda override: override[0].prefixlen,
+            reverse=True)
+        self.max_buckets_per_shard = max_buckets_per_shard
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+
+    def limits_for(self, ip_address: str) -> Tuple[float, float]:
+        """
+        Return the rate and burst that apply to an IP address.
+
+        Unix domain socket clients, identified as 'unix:<uid>', are local
+        and get the limits of the first override covering a loopback
+        address.
+
+        Args:
+            ip_address (str): IP address of the client.
+
+        Returns:
+            Tuple[float, float]: Queries per second and bucket size.
+        """
+        if self.overrides:
+            import ipaddress
+            addresses: 'Sequence[IPAddress]'
+            if ip_address == 'unix' or ip_address.startswith('unix:'):
+                addresses = [ipaddress.ip_address(loopback)
+                             for loopback in _LOOPBACK_ADDRESSES]
+            else:
+                try:
+                    addresses = (ipaddress.ip_address(ip_address),)
+                except ValueError:
+                    return self.rate, self.burst
+            for network, rate, burst in self.overrides:
+                if any(address in network for address in addresses):
+                    return rate, burst
+        return self.rate, self.burst
+
+    def allow(self, ip_address: str) -> bool:
+        """
+        Check whether a query from the given IP address may proceed.
+
+        Args:
+            ip_address (str): IP address of the client.
+
+        Returns:
+            bool: True if the query is within the limit, False otherwise.
+        """
+        if not self.rate and not self.overrides:
+            return True
+        shard = self._shards[hash(ip_address) % len(self._shards)]
+        now = self._clock()
+        with shard.lock:
+            bucket = shard.buckets.get(ip_address)
+            if bucket is None:
+                rate, burst = self.limits_for(ip_address)
+                if not rate:
+                    return True
+                if len(shard.buckets) >= self.max_buckets_per_shard:
+                    self._prune(shard, now)
+                bucket = TokenBucket(rate, burst, now)
+                shard.buckets[ip_address] = bucket
+            return bucket.consume(now)
+
+    @staticmethod
+    def _prune(shard: _Shard, now: float) -> None:
+        """
+        Drop buckets that have refilled, as they hold no state worth keeping.
+
+        Args:
+            shard (_Shard): Shard to prune; its lock must be held.
+            now (float): Current clock reading.
+
+        Returns:
+            None
+        """
+        for ip_address, bucket in list(shard.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del shard.buckets[ip_address]
+
+
+def _resolve_limits(rate: float, burst: Optional[float],
+                    source: str) -> Tuple[float, float]:
+    """
+    Validate a configured rate and burst, defaulting the burst.
+
+    Without a burst a client may make 'rate' queries at once, but never
+    fewer than one, so rates below one query per second still admit
+    queries.
+
+    Args:
+        rate (float): Queries per second, 0 for no limit.
+        burst (Optional[float]): Bucket size, or None for the default.
+        source (str): Where the values were configured, for errors.
+
+    Returns:
+        Tuple[float, float]: The rate and burst.
+
+    Raises:
+        ValueError: If the rate is negative or a limited burst is below 1.
+    """
+    if rate < 0:
+        raise ValueError(f"Negative rate limit in {source}: {rate:g}")
+    if burst is None:
+        burst = max(1.0, rate)
+    elif rate and burst < 1:
+        # A bucket that cannot hold a whole token never admits a query
+        raise ValueError(f"Rate limit burst below 1 in {source}: {burst:g}")
+    return rate, burst
+
+
+def _parse_override(value: str) -> 'Tuple[IPNetwork, float, float]':
+    """
+    Parse a 'CIDR rate [burst]' override entry.
+
+    Args:
+        value (str): The override entry from the configuration.
+
+    Returns:
+        Tuple[IPNetwork, float, float]: The network, rate and burst.
+
+    Raises:
+        ValueError: If the entry is malformed or its limits are invalid.
+    """
+    import ipaddress
+    parts = value.split()
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid rate limit override: '{value}'")
+    network = ipaddress.ip_network(parts[0], strict=False)
+    rate, burst = _resolve_limits(
+        float(parts[1]), float(parts[2]) if len(parts) == 3 else None,
+        f"override '{value}'")
+    return network, rate, burst
+
+
+def load_rate_limiter(config: configparser.ConfigParser) -> RateLimiter:
+    """
+    Build a RateLimiter from the 'RateLimit' configuration sections.
+
+    The '[RateLimit]' section sets the default 'rate' (queries per second,
+    0 disables limiting) and 'burst' (at least 1, by default the rate or
+    1 if the rate is lower). Each entry of the optional
+    '[RateLimitOverrides]' section has the form 'CIDR rate [burst]'.
+
+    Args:
+        config (configparser.ConfigParser): The loaded configuration.
+
+    Returns:
+        RateLimiter: The configured rate limiter.
+
+    Raises:
+        ValueError: If a rate is negative, a burst is below 1 or an
+        override is malformed.
+    """
+    rate, burst = _resolve_limits(
+        config.getfloat('RateLimit', 'rate', fallback=0.0),
+        config.getfloat('RateLimit', 'burst', fallback=None),
+        '[RateLimit]')
+    overrides = []
+    if config.has_section('RateLimitOverrides'):
+        overrides = [_parse_override(value) for _, value
+                     in config.items('RateLimitOverrides')]
+    return RateLimiter(rate, burst, overrides,
+                       shards=config.getint('RateLimit', 'shards',
+                                            fallback=16))
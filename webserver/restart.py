@@ -0,0 +1,102 @@
+"""
+This module provides zero-downtime restarts by handing the listening
+socket to a replacement server process.
+
+The running server starts a new process that inherits the listening
+socket's file descriptor. The new process builds its index and then
+reports that it is ready over a pipe; only then does the old process
+stop accepting and drain its connections. Connections arriving in the
+meantime wait in the shared accept queue, so none are refused.
+"""
+import os
+import select
+import socket
+import sys
+from typing import List, Optional
+
+# Environment variables passed to the replacement process
+LISTEN_FD_ENV = 'WEBSERVER_LISTEN_FD'
+READY_FD_ENV = 'WEBSERVER_READY_FD'
+
+
+def inherited_listening_socket() -> Optional[socket.socket]:
+    """
+    Return the listening socket handed over by a previous server process.
+
+    Returns:
+        Optional[socket.socket]: The inherited socket, or None if this
+        process was not started as a replacement.
+    """
+    listen_fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if listen_fd is None:
+        return None
+    return socket.socket(fileno=int(listen_fd))
+
+
+def is_replacement() -> bool:
+    """
+    Check whether this process was started to replace a running server.
+
+    Returns:
+        bool: True if a previous server is waiting for this process.
+    """
+    return READY_FD_ENV in os.environ
+
+
+def notify_ready() -> None:
+    """
+    Tell the previous server process that this process is serving.
+
+    Does nothing if this process was not started as a replacement.
+
+    Returns:
+        None
+    """
+    ready_fd = os.environ.pop(READY_FD_ENV, None)
+    if ready_fd is None:
+        return
+    try:
+        os.write(int(ready_fd), b'1')
+    finally:
+        os.close(int(ready_fd))
+
+
+def spawn_replacement(listen_fd: int, timeout: float,
+                      command: Optional[List[str]] = None) -> bool:
+    """
+    Start a replacement server sharing the listening socket and wait for it.
+
+    Args:
+        listen_fd (int): File descriptor of the listening socket.
+        timeout (float): Seconds to wait for the replacement to be ready.
+        command (Optional[List[str]]): Command starting the replacement;
+            defaults to rerunning the server with this process's arguments.
+
+    Returns:
+        bool: True if the replacement reported it is ready. Otherwise the
+        replacement is terminated.
+    """
+    # Imported here as it is only needed for a restart
+    import subprocess
+
+    if command is None:
+        command = [sys.executable, '-m', 'webserver.server'] + sys.argv[1:]
+    ready_read, ready_write = os.pipe()
+    env = dict(os.environ)
+    env[LISTEN_FD_ENV] = str(listen_fd)
+    env[READY_FD_ENV] = str(ready_write)
+    try:
+        process = subprocess.Popen(command, env=env,
+                                   pass_fds=(listen_fd, ready_write))
+    finally:
+        os.close(ready_write)
+    try:
+        readable, _, _ = select.select([ready_read], [], [], timeout)
+        # A replacement that exits early closes the pipe without writing
+        ready = bool(readable) and os.read(ready_read, 1) == b'1'
+    finally:
+        os.close(ready_read)
+    if not ready:
+        process.terminate()
+        process.wait()
+    return ready
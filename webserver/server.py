@@ -2,23 +2,401 @@
 This module provides server-side functionality for handling client connections
 and processing requests.
 """
+import configparser
+import errno
+import os
+import select
+import signal
 import socket
+import stat
+import struct
 import threading
-import configparser
 import time
 import ssl
-from typing import Tuple, Dict, List
+from types import FrameType
+from typing import Any, Tuple, Dict, List, Optional, Set
+from webserver.metrics import ServerMetrics
+from webserver.ratelimit import RateLimiter, load_rate_limiter
+from webserver.restart import (inherited_listening_socket, is_replacement,
+                               notify_ready, spawn_replacement)
+from webserver.settings import configure_from_args, get_settings
+from webserver.watcher import IndexWatcher
+
+
+class ConnectionLimiter:
+    """
+    Tracks open client connections against global and per-IP caps.
+
+    Slots reserved for a client socket are remembered, so that when a cap
+    is reached the slots of clients that have already hung up can be
+    reclaimed before a new connection is turned away, without waiting for
+    their handler threads to notice.
+
+    Args:
+        max_total (int): Maximum number of open connections, 0 for no limit.
+        max_per_ip (int): Maximum number of open connections from a single
+            IP address, 0 for no limit.
+    """
+
+    def __init__(self, max_total: int, max_per_ip: int) -> None:
+        self.max_total = max_total
+        self.max_per_ip = max_per_ip
+        self._lock = threading.Lock()
+        self._total = 0
+        self._per_ip: Dict[str, int] = {}
+        # Client sockets holding a slot, by IP address
+        self._sockets: Dict[str, Set[socket.socket]] = {}
+
+    def acquire(self, ip_address: str,
+                client_socket: Optional[socket.socket] = None
+                ) -> Optional[str]:
+        """
+        Reserve a connection slot for the given IP address.
+
+        Args:
+            ip_address (str): IP address of the connecting client.
+            client_socket (Optional[socket.socket]): The connection the
+                slot is for, so it can be reclaimed once the client hangs
+                up.
+
+        Returns:
+            Optional[str]: None if the connection is admitted, otherwise
+            the name of the limit that rejected it.
+        """
+        with self._lock:
+            rejection = self._check(ip_address)
+            if rejection == 'global_limit' and self._reclaim(None):
+                rejection = self._check(ip_address)
+            if rejection == 'per_ip_limit' and self._reclaim(ip_address):
+                rejection = self._check(ip_address)
+            if rejection is not None:
+                return rejection
+            self._total += 1
+            self._per_ip[ip_address] = self._per_ip.get(ip_address, 0) + 1
+            if client_socket is not None:
+                self._sockets.setdefault(ip_address, set()).add(client_socket)
+            return None
+
+    def release(self, ip_address: str,
+                client_socket: Optional[socket.socket] = None) -> None:
+        """
+        Free a connection slot previously reserved with 'acquire'.
+
+        Args:
+            ip_address (str): IP address of the disconnected client.
+            client_socket (Optional[socket.socket]): The connection passed
+                to 'acquire', if any.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if client_socket is not None:
+                sockets = self._sockets.get(ip_address, set())
+                if client_socket not in sockets:
+                    # Already reclaimed after the client hung up
+                    return
+                self._forget(ip_address, client_socket)
+            self._free(ip_address)
+
+    def open_connections(self) -> int:
+        """
+        Return the number of currently open connections.
+
+        Returns:
+            int: Number of reserved connection slots.
+        """
+        with self._lock:
+            return self._total
+
+    def _check(self, ip_address: str) -> Optional[str]:
+        """
+        Return the limit a new connection from the address would exceed.
+
+        Args:
+            ip_address (str): IP address of the connecting client.
+
+        Returns:
+            Optional[str]: The name of the limit, or None if neither is
+            reached.
+        """
+        if self.max_total and self._total >= self.max_total:
+            return 'global_limit'
+        if (self.max_per_ip
+                and self._per_ip.get(ip_address, 0) >= self.max_per_ip):
+            return 'per_ip_limit'
+        return None
+
+    def _reclaim(self, ip_address: Optional[str]) -> int:
+        """
+        Free the slots of connections whose clients have hung up.
+
+        Args:
+            ip_address (Optional[str]): Only check connections from this
+                address; None to check all of them.
+
+        Returns:
+            int: Number of slots freed.
+        """
+        if ip_address is None:
+            candidates = [(address, client_socket)
+                          for address, sockets in self._sockets.items()
+                          for client_socket in sockets]
+        else:
+            candidates = [(ip_address, client_socket) for client_socket
+                          in self._sockets.get(ip_address, set())]
+        reclaimed = 0
+        for address, client_socket in candidates:
+            if _peer_closed(client_socket):
+                self._forget(address, client_socket)
+                self._free(address)
+                reclaimed += 1
+        return reclaimed
+
+    def _forget(self, ip_address: str, client_socket: socket.socket) -> None:
+        """
+        Stop remembering which socket holds a slot.
+
+        Args:
+            ip_address (str): IP address of the client.
+            client_socket (socket.socket): The client's connection.
+
+        Returns:
+            None
+        """
+        sockets = self._sockets[ip_address]
+        sockets.discard(client_socket)
+        if not sockets:
+            del self._sockets[ip_address]
+
+    def _free(self, ip_address: str) -> None:
+        """
+        Decrement the open connection counts for an address.
+
+        Args:
+            ip_address (str): IP address of the client.
+
+        Returns:
+            None
+        """
+        open_for_ip = self._per_ip.get(ip_address, 0)
+        if open_for_ip <= 0:
+            return
+        self._total -= 1
+        if open_for_ip == 1:
+            del self._per_ip[ip_address]
+        else:
+            self._per_ip[ip_address] = open_for_ip - 1
+
+
+def _peer_closed(client_socket: socket.socket) -> bool:
+    """
+    Check, without blocking, whether a client has closed its end.
+
+    Uses POLLRDHUP, so on platforms without it this reports False and
+    slots are only freed by the connection's handler.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
 
-config = configparser.ConfigParser()
-config.read("config.ini")
-linuxpath = config.get("Server", "linuxpath")
-sslcert = config.get("Server", "sslcert")
-sslkey = config.get("Server", "sslkey")
-reread_on_query = config.getboolean('Server', 'REREAD_ON_QUERY')
+    Returns:
+        bool: True if the client hung up or the socket is already closed.
+    """
+    if not hasattr(select, 'POLLRDHUP'):
+        return False
+    poller = select.poll()
+    try:
+        poller.register(client_socket, select.POLLRDHUP)
+    except (ValueError, OSError):
+        # Closed by its handler, which is about to release the slot
+        return True
+    return bool(poller.poll(0))
+
+
+class ConnectionTracker:
+    """
+    Tracks which client connections are idle or processing a query, so the
+    server can drain them on shutdown.
+
+    Draining closes idle connections at once, lets busy connections finish
+    their current query, and force-closes whatever is left at the deadline.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        # Client socket mapped to whether it is processing a query
+        self._busy: Dict[socket.socket, bool] = {}
+        self.draining = False
+
+    def register(self, client_socket: socket.socket) -> bool:
+        """
+        Start tracking a new connection.
+
+        The connection counts as busy until its first query is answered,
+        so draining does not cut off a query that is already on its way.
+
+        Args:
+            client_socket (socket.socket): Socket connection with client.
+
+        Returns:
+            bool: False if the server is draining and the connection
+            should be closed instead of served.
+        """
+        with self._condition:
+            if self.draining:
+                return False
+            self._busy[client_socket] = True
+            return True
+
+    def unregister(self, client_socket: socket.socket) -> None:
+        """
+        Stop tracking a closed connection.
+
+        Args:
+            client_socket (socket.socket): Socket connection with client.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            self._busy.pop(client_socket, None)
+            self._condition.notify_all()
+
+    def mark_busy(self, client_socket: socket.socket) -> None:
+        """
+        Record that a connection received a query.
+
+        Args:
+            client_socket (socket.socket): Socket connection with client.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            if client_socket in self._busy:
+                self._busy[client_socket] = True
 
-# Set up a server socket
-SERVER_HOST = socket.gethostbyname(socket.gethostname())
-SERVER_PORT = 12345
+    def mark_idle(self, client_socket: socket.socket) -> bool:
+        """
+        Record that a connection is waiting for its next query.
+
+        Args:
+            client_socket (socket.socket): Socket connection with client.
+
+        Returns:
+            bool: False if the server is draining and the connection
+            should be closed instead of waiting.
+        """
+        with self._condition:
+            if client_socket in self._busy:
+                self._busy[client_socket] = False
+            return not self.draining
+
+    def open_connections(self) -> int:
+        """
+        Return the number of tracked connections.
+
+        Returns:
+            int: Number of open connections.
+        """
+        with self._condition:
+            return len(self._busy)
+
+    def drain(self, timeout: float) -> int:
+        """
+        Close idle connections and wait for busy ones to finish.
+
+        Args:
+            timeout (float): Seconds to wait before force-closing the
+                connections that are still open.
+
+        Returns:
+            int: Number of connections that had to be force-closed.
+        """
+        with self._condition:
+            self.draining = True
+            for client_socket, busy in self._busy.items():
+                if not busy:
+                    # Wakes the handler blocked in recv; a response already
+                    # being written can still be sent
+                    _shutdown_socket(client_socket, socket.SHUT_RD)
+            self._condition.wait_for(lambda: not self._busy, timeout)
+            remaining = list(self._busy)
+        for client_socket in remaining:
+            _shutdown_socket(client_socket, socket.SHUT_RDWR)
+        return len(remaining)
+
+
+def _shutdown_socket(client_socket: socket.socket, how: int) -> None:
+    """
+    Shut down a connection without closing it, ignoring errors.
+
+    The plain socket method is used even for SSL sockets, whose own
+    'shutdown' would discard the SSL state needed to send a response.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
+        how (int): Which directions to shut down, as for socket.shutdown.
+
+    Returns:
+        None
+    """
+    try:
+        socket.socket.shutdown(client_socket, how)
+    except OSError:
+        pass
+
+
+class ServerShutdown(Exception):
+    """Raised in the main thread when the server is asked to stop."""
+
+
+metrics = ServerMetrics()
+connection_tracker = ConnectionTracker()
+# Built from the settings on first use, see get_connection_limiter and
+# get_rate_limiter
+connection_limiter: Optional[ConnectionLimiter] = None
+rate_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+# Set by start_server when the file is watched in the background
+index_watcher: Optional[IndexWatcher] = None
+_restart_lock = threading.Lock()
+# Seconds between checks for a shutdown request while waiting to accept
+_ACCEPT_INTERVAL = 0.5
+# Accept errors caused by running out of descriptors or memory
+_RESOURCE_ERRORS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+
+
+def get_connection_limiter() -> ConnectionLimiter:
+    """
+    Return the server's connection limiter, creating it on first use.
+
+    Returns:
+        ConnectionLimiter: The limiter configured from the settings.
+    """
+    global connection_limiter
+    with _limiter_lock:
+        if connection_limiter is None:
+            settings = get_settings()
+            connection_limiter = ConnectionLimiter(
+                settings.max_connections, settings.max_connections_per_ip)
+        return connection_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the server's rate limiter, creating it on first use.
+
+    Returns:
+        RateLimiter: The limiter configured from the settings.
+    """
+    global rate_limiter
+    with _limiter_lock:
+        if rate_limiter is None:
+            config = get_settings().config
+            rate_limiter = load_rate_limiter(
+                config if config is not None else configparser.ConfigParser())
+        return rate_limiter
 
 
 # function to reuse when reading files
@@ -70,7 +448,16 @@ def handle_client_connection(client_socket: socket.socket,
     Handles a client connection and receives messages.
 
     Receives messages from the client connected to the socket
-    and address specified.
+    and address specified. The SSL handshake, if any, and the first
+    query must each complete within 'query_timeout' seconds of
+    connecting, and later queries within
+    'idle_timeout' seconds of the previous one; slower clients are
+    disconnected so they cannot hold a thread indefinitely. Queries over
+    the client IP's rate limit are answered with 'RATE LIMITED'. When the
+    file is watched, each query uses the watcher's latest index instead of
+    reading the file. While the server drains, the connection is closed
+    once its current query, or for a new connection its first query, has
+    been answered.
 
     Args:
         client_socket (socket.socket): Socket connection with client.
@@ -80,16 +467,39 @@ def handle_client_connection(client_socket: socket.socket,
         None
     """
     requesting_ip: str = address[0]
+    settings = get_settings()
+    limiter = get_rate_limiter()
+    tracker = connection_tracker
+    linuxpath = settings.linuxpath
+    watcher = index_watcher
+    client_socket.settimeout(_as_timeout(settings.query_timeout))
+    handshake_failure = _handshake(client_socket)
+    if handshake_failure is not None:
+        client_socket.close()
+        metrics.record_close(handshake_failure)
+        return
     try:
-        index = read_file(linuxpath)
+        index = watcher.index if watcher is not None else read_file(linuxpath)
     except FileNotFoundError:
         print('File not found:', linuxpath)
         client_socket.close()
+        metrics.record_close('file_not_found')
         return
+    close_reason = 'client_closed'
+    waiting_for_first_query = True
     while True:
+        if not waiting_for_first_query and not tracker.mark_idle(
+                client_socket):
+            close_reason = 'shutdown'
+            break
         try:
             # Specify the maximum amount of data to receive
             received_data = client_socket.recv(1024)
+            tracker.mark_busy(client_socket)
+            if waiting_for_first_query:
+                waiting_for_first_query = False
+                client_socket.settimeout(
+                    _as_timeout(settings.idle_timeout))
             try:
                 # Specify the correct encoding
                 decoded_data = received_data.decode('utf-8')
@@ -99,9 +509,18 @@ def handle_client_connection(client_socket: socket.socket,
             # Strip any trailing null bytes and newlines
             data = decoded_data.rstrip('\x00\n')
             if not data:
+                if tracker.draining:
+                    close_reason = 'shutdown'
                 break
 
-            if reread_on_query:
+            if not limiter.allow(requesting_ip):
+                client_socket.send(b'RATE LIMITED\n')
+                metrics.increment('queries_rate_limited')
+                continue
+
+            if watcher is not None:
+                index = watcher.index
+            elif settings.reread_on_query:
                 index = read_file(linuxpath)
             start_time: float = time.time()
             if search_string_in_file(index, data):
@@ -116,6 +535,7 @@ def handle_client_connection(client_socket: socket.socket,
             if len(response) > 1024:
                 print('Payload exceeds maximum size.')
                 client_socket.close()
+                metrics.record_close('payload_too_large')
                 return
 
             log_msg: str = (
@@ -125,11 +545,427 @@ def handle_client_connection(client_socket: socket.socket,
                 f'timestamp={time.time()}'
             )
             print(log_msg)
+        except socket.timeout:
+            if waiting_for_first_query:
+                close_reason = 'slow_client'
+            else:
+                close_reason = 'idle_timeout'
+            break
         except socket.error as socket_error:
             print(
                 f'Error receiving or sending data: {socket_error}')
+            close_reason = 'error'
             break
     client_socket.close()
+    metrics.record_close(close_reason)
+
+
+def _handshake(client_socket: socket.socket) -> Optional[str]:
+    """
+    Perform the SSL handshake of a connection accepted without one.
+
+    The handshake runs in the connection's handler thread, under the
+    socket's timeout, so a slow or broken client cannot hold up the
+    thread accepting connections.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
+
+    Returns:
+        Optional[str]: None if the handshake succeeded or the connection
+        does not use SSL, otherwise the reason to close it.
+    """
+    if not isinstance(client_socket, ssl.SSLSocket):
+        return None
+    try:
+        client_socket.do_handshake()
+    except socket.timeout:
+        return 'slow_client'
+    except (ssl.SSLError, OSError) as handshake_error:
+        print(f'SSL handshake failed: {handshake_error}')
+        return 'handshake_failed'
+    return None
+
+
+def _as_timeout(seconds: float) -> Optional[float]:
+    """
+    Convert a configured timeout into a socket timeout value.
+
+    Args:
+        seconds (float): Configured timeout, 0 to disable it.
+
+    Returns:
+        Optional[float]: The timeout, or None to block without limit.
+    """
+    return seconds if seconds > 0 else None
+
+
+def _serve_client(client_socket: socket.socket,
+                  address: Tuple[str, int]) -> None:
+    """
+    Handle a registered client connection, then make sure it is closed,
+    unregistered and its slot in the connection limiter is freed.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
+        address (Tuple[str, int]): IP address and port of the client.
+
+    Returns:
+        None
+    """
+    try:
+        handle_client_connection(client_socket, address)
+    finally:
+        # Closing again is harmless, and covers a handler that raised
+        client_socket.close()
+        connection_tracker.unregister(client_socket)
+        get_connection_limiter().release(address[0], client_socket)
+
+
+def _reject_connection(client_socket: socket.socket, reason: str) -> None:
+    """
+    Tell a client the server is at capacity and close its connection.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
+        reason (str): Name of the limit that rejected the connection.
+
+    Returns:
+        None
+    """
+    try:
+        client_socket.send(b'SERVER BUSY\n')
+    except socket.error:
+        pass
+    finally:
+        client_socket.close()
+        metrics.record_close(reason)
+
+
+def log_metrics() -> None:
+    """
+    Print the server metrics and current connection count as one line.
+
+    Returns:
+        None
+    """
+    metrics.set_gauge('open_connections',
+                      connection_tracker.open_connections())
+    print(f'METRICS: {metrics.format()}, timestamp={time.time()}')
+
+
+def _log_metrics_periodically(interval: float,
+                              stopping: threading.Event) -> None:
+    """
+    Log the server metrics every interval until the server stops.
+
+    Args:
+        interval (float): Seconds between log lines.
+        stopping (threading.Event): Set when the server shuts down.
+
+    Returns:
+        None
+    """
+    while not stopping.wait(interval):
+        log_metrics()
+
+
+def _request_shutdown(signum: int, frame: Optional[FrameType]) -> None:
+    """
+    Signal handler that abandons starting the server.
+
+    Replaced by '_stop_on_signal' once the server is accepting.
+
+    Args:
+        signum (int): The signal received.
+        frame (Optional[FrameType]): The interrupted stack frame.
+
+    Raises:
+        ServerShutdown: Always.
+    """
+    raise ServerShutdown(f'Received signal {signum}')
+
+
+def _hot_restart(listen_fd: int) -> None:
+    """
+    Hand the listening socket to a new server process, then shut down.
+
+    The current process keeps serving until the replacement reports that
+    its index is built, and keeps serving if the replacement fails.
+
+    Args:
+        listen_fd (int): File descriptor of the listening socket.
+
+    Returns:
+        None
+    """
+    if not _restart_lock.acquire(blocking=False):
+        return
+    try:
+        print('[*] Starting replacement server...')
+        if spawn_replacement(listen_fd, get_settings().restart_timeout):
+            print('[*] Replacement server ready, draining connections.')
+            os.kill(os.getpid(), signal.SIGTERM)
+        else:
+            print('Replacement server did not become ready.')
+    finally:
+        _restart_lock.release()
+
+
+def _install_signal_handlers(listen_fd: int) -> Dict[int, Any]:
+    """
+    Drain on SIGTERM and hot-restart on SIGUSR2.
+
+    Signal handlers can only be installed from the main thread; elsewhere
+    this does nothing.
+
+    Args:
+        listen_fd (int): File descriptor of the listening socket.
+
+    Returns:
+        Dict[int, Any]: The previous handlers, for
+        '_restore_signal_handlers'.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return {}
+    previous: Dict[int, Any] = {signal.SIGTERM: signal.signal(
+        signal.SIGTERM, _request_shutdown)}
+    if hasattr(signal, 'SIGUSR2'):
+        def start_restart(signum: int, frame: Optional[FrameType]) -> None:
+            threading.Thread(target=_hot_restart, args=(listen_fd,),
+                             daemon=True).start()
+        previous[signal.SIGUSR2] = signal.signal(signal.SIGUSR2,
+                                                 start_restart)
+    return previous
+
+
+def _restore_signal_handlers(previous: Dict[int, Any]) -> None:
+    """
+    Reinstall the handlers replaced by '_install_signal_handlers'.
+
+    Args:
+        previous (Dict[int, Any]): Signal numbers mapped to handlers.
+
+    Returns:
+        None
+    """
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+
+
+def _stop_on_signal(stopping: threading.Event) -> None:
+    """
+    Make SIGTERM stop the accept loop instead of interrupting it.
+
+    An exception raised by a signal handler could arrive between accepting
+    a connection and handing it to its thread, losing the connection. Once
+    the server is accepting, SIGTERM therefore only sets 'stopping', which
+    the accept loop checks at least every _ACCEPT_INTERVAL seconds.
+
+    Signal handlers can only be installed from the main thread; elsewhere
+    this does nothing.
+
+    Args:
+        stopping (threading.Event): Set when SIGTERM is received.
+
+    Returns:
+        None
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def request_stop(signum: int, frame: Optional[FrameType]) -> None:
+        stopping.set()
+    signal.signal(signal.SIGTERM, request_stop)
+
+
+def _hold_signals_while_draining(stopping: threading.Event) -> None:
+    """
+    Keep a repeated SIGTERM or SIGUSR2 from killing a draining server.
+
+    SIGTERM only sets 'stopping', which is already set, and SIGUSR2 is
+    ignored since the server is no longer accepting connections to hand
+    over. 'start_server' restores the previous handlers once the drain
+    has finished. Only called from the main thread.
+
+    Args:
+        stopping (threading.Event): The server's stopping event.
+
+    Returns:
+        None
+    """
+    _stop_on_signal(stopping)
+    if hasattr(signal, 'SIGUSR2'):
+        signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+
+
+def _accept_connections(server_socket: socket.socket,
+                        limiter: ConnectionLimiter,
+                        stopping: threading.Event,
+                        unix: bool = False) -> None:
+    """
+    Accept connections and start a handler thread for each one.
+
+    Errors accepting or setting up a single connection are logged and
+    counted, and the loop carries on until the server is stopping. Each
+    connection is registered with the connection tracker before its
+    thread starts, so a drain that follows the loop waits for it.
+
+    Args:
+        server_socket (socket.socket): The listening socket.
+        limiter (ConnectionLimiter): Caps checked for every connection.
+        stopping (threading.Event): Set before the listening socket is
+            closed, after which accept errors end the loop.
+        unix (bool): Whether the socket is a Unix domain socket, whose
+            clients are identified by user rather than IP address.
+
+    Returns:
+        None
+    """
+    tracker = connection_tracker
+    while not stopping.is_set():
+        try:
+            client_socket, address = server_socket.accept()
+        except socket.timeout:
+            # Woken up to check whether the server is stopping
+            continue
+        except BlockingIOError:
+            # Another process sharing the socket took the connection
+            continue
+        except OSError as accept_error:
+            if stopping.is_set():
+                return
+            # A failed accept concerns one connection, not the server
+            print(f'Error accepting connection: {accept_error}')
+            metrics.increment('accept_errors')
+            if accept_error.errno in _RESOURCE_ERRORS:
+                # Give open connections a chance to close before retrying
+                time.sleep(0.1)
+            continue
+        if unix:
+            try:
+                address = _unix_peer_address(client_socket)
+            except OSError as peer_error:
+                # The client went away before it could be identified
+                print(f'Error identifying client: {peer_error}')
+                metrics.increment('accept_errors')
+                client_socket.close()
+                continue
+        rejection = limiter.acquire(address[0], client_socket)
+        if rejection is not None:
+            _reject_connection(client_socket, rejection)
+            continue
+        if not tracker.register(client_socket):
+            limiter.release(address[0], client_socket)
+            client_socket.close()
+            metrics.record_close('shutdown')
+            continue
+        client_thread = threading.Thread(
+            target=_serve_client, args=(client_socket, address))
+        try:
+            client_thread.start()
+        except RuntimeError as thread_error:
+            print(f'Error starting handler thread: {thread_error}')
+            tracker.unregister(client_socket)
+            limiter.release(address[0], client_socket)
+            _reject_connection(client_socket, 'thread_limit')
+
+
+def _accept_unix_connections(unix_socket: socket.socket,
+                             limiter: ConnectionLimiter,
+                             stopping: threading.Event) -> None:
+    """
+    Accept connections on the Unix domain socket until the server stops.
+
+    Args:
+        unix_socket (socket.socket): The listening Unix domain socket.
+        limiter (ConnectionLimiter): Caps checked for every connection.
+        stopping (threading.Event): Set before the socket is closed.
+
+    Returns:
+        None
+    """
+    _accept_connections(unix_socket, limiter, stopping, unix=True)
+
+
+def _unix_peer_address(client_socket: socket.socket) -> Tuple[str, int]:
+    """
+    Identify a Unix domain socket client for limits and logging.
+
+    Args:
+        client_socket (socket.socket): Socket connection with client.
+
+    Returns:
+        Tuple[str, int]: 'unix:<uid>' and the client's process ID where
+        the platform reports them, otherwise 'unix' and 0.
+    """
+    if hasattr(socket, 'SO_PEERCRED'):
+        credentials = client_socket.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        pid, uid, _ = struct.unpack('3i', credentials)
+        return f'unix:{uid}', pid
+    return 'unix', 0
+
+
+def _listen_unix(path: str, mode: int) -> Tuple[socket.socket, int]:
+    """
+    Listen on a Unix domain socket, replacing any existing one at the path.
+
+    The socket is bound under a temporary name, given its permissions and
+    then renamed into place, so clients never find the path missing or
+    accessible with the wrong permissions, even during a hot restart.
+
+    Args:
+        path (str): Path of the socket.
+        mode (int): Permission bits for the socket file.
+
+    Returns:
+        Tuple[socket.socket, int]: The listening socket, and the inode of
+        the socket file for '_close_unix'.
+    """
+    temporary_path = f'{path}.{os.getpid()}'
+    if os.path.exists(temporary_path):
+        os.unlink(temporary_path)
+    unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        unix_socket.bind(temporary_path)
+        os.chmod(temporary_path, mode)
+        unix_socket.listen()
+        inode = os.stat(temporary_path).st_ino
+        os.replace(temporary_path, path)
+    except OSError:
+        unix_socket.close()
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+    return unix_socket, inode
+
+
+def _close_unix(unix_socket: socket.socket, path: str, inode: int) -> None:
+    """
+    Stop listening on a Unix domain socket and remove its file.
+
+    The file is left alone if it was replaced by another server, such as
+    the new process after a hot restart.
+
+    Args:
+        unix_socket (socket.socket): The listening Unix domain socket.
+        path (str): Path the socket was published at.
+        inode (int): Inode of the socket file when it was published.
+
+    Returns:
+        None
+    """
+    try:
+        path_status = os.stat(path)
+        if (stat.S_ISSOCK(path_status.st_mode)
+                and path_status.st_ino == inode):
+            os.unlink(path)
+    except OSError:
+        pass
+    # Wakes the accepting thread before the socket is closed
+    _shutdown_socket(unix_socket, socket.SHUT_RDWR)
+    unix_socket.close()
 
 
 # function that creates a server
@@ -140,38 +976,120 @@ def start_server() -> None:
     The function starts the server and listens for incoming connections on
     the specified SERVER. It accepts client connections, creates a new thread
     for each connection, and assigns the client handling to the
-    'handle_client_connection' function.
+    'handle_client_connection' function. Connections beyond the global or
+    per-IP limits are answered with 'SERVER BUSY' and closed. If WATCH_FILE
+    is set, the index is built and watched before connections are accepted.
+    The server metrics are logged every 'metrics_interval' seconds and on
+    shutdown.
+
+    On SIGTERM or KeyboardInterrupt the server stops accepting, lets
+    in-flight queries finish, closes idle connections and force-closes
+    anything still open after 'drain_timeout' seconds. On SIGUSR2 it
+    starts a replacement process that inherits the listening socket, and
+    drains once the replacement is ready. The replacement only has a
+    prebuilt index to serve if WATCH_FILE is set.
+
+    If 'unix_socket_path' is set, the server also accepts connections on
+    that Unix domain socket, without SSL, from a background thread.
 
     Returns:
         None
+
+    Raises:
+        ValueError: If the rate limit configuration is invalid.
     """
+    global index_watcher, connection_tracker
     server_socket = None
-    use_ssl = config.getboolean('Server', 'ssl')
+    unix_socket: Optional[socket.socket] = None
+    unix_inode = 0
+    unix_thread: Optional[threading.Thread] = None
+    stopping = threading.Event()
+    previous_handlers: Dict[int, Any] = {}
+    settings = get_settings()
+    # Built before listening so invalid limits fail at startup rather
+    # than in every handler thread
+    limiter = get_connection_limiter()
+    get_rate_limiter()
+    connection_tracker = ConnectionTracker()
     try:
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((SERVER_HOST, SERVER_PORT))
-        server_socket.listen()
-        if use_ssl:
+        if settings.watch_file:
+            index_watcher = IndexWatcher(settings.linuxpath, read_file,
+                                         settings.watch_interval, metrics)
+            index_watcher.start()
+        elif is_replacement():
+            # Queries read the file themselves without WATCH_FILE, so this
+            # only fails the restart before taking over if it is unreadable
+            read_file(settings.linuxpath)
+        server_socket = inherited_listening_socket()
+        if server_socket is None:
+            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server_socket.setsockopt(socket.SOL_SOCKET,
+                                     socket.SO_REUSEADDR, 1)
+            server_socket.bind((settings.host, settings.port))
+            server_socket.listen()
+        # Accepted sockets are still blocking, see socket.accept
+        server_socket.settimeout(_ACCEPT_INTERVAL)
+        previous_handlers = _install_signal_handlers(server_socket.fileno())
+        if settings.server_ssl:
             # Create an SSL context
             context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-            context.load_cert_chain(certfile=sslcert, keyfile=sslkey)
+            context.load_cert_chain(certfile=settings.sslcert,
+                                    keyfile=settings.sslkey)
             # Wrap the server socket with SSL
+            # Handshakes run in the handler threads, see _handshake
             server_socket = context.wrap_socket(
-                server_socket, server_side=True)
-        while True:
-            client_socket, address = server_socket.accept()
-            client_thread = threading.Thread(
-                target=handle_client_connection, args=(client_socket, address))
-            client_thread.start()
+                server_socket, server_side=True,
+                do_handshake_on_connect=False)
+        if settings.unix_socket_path:
+            unix_socket, unix_inode = _listen_unix(
+                settings.unix_socket_path, settings.unix_socket_mode)
+            unix_thread = threading.Thread(
+                target=_accept_unix_connections,
+                args=(unix_socket, limiter, stopping), daemon=True,
+                name='unix-accept')
+            unix_thread.start()
+        if settings.metrics_interval > 0:
+            threading.Thread(target=_log_metrics_periodically,
+                             args=(settings.metrics_interval, stopping),
+                             daemon=True, name='metrics').start()
+        notify_ready()
+        _stop_on_signal(stopping)
+        _accept_connections(server_socket, limiter, stopping)
     except (socket.error, ssl.SSLError) as connection_error:
         print(f'Error starting server: {connection_error}')
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, ServerShutdown):
         pass
     finally:
+        stopping.set()
+        if previous_handlers:
+            _hold_signals_while_draining(stopping)
         if server_socket:
             server_socket.close()
+            log_metrics()
+        if unix_socket is not None:
+            _close_unix(unix_socket, settings.unix_socket_path, unix_inode)
+        if unix_thread is not None:
+            # Connections it accepted are registered once it returns
+            unix_thread.join(settings.drain_timeout)
+        forced = connection_tracker.drain(settings.drain_timeout)
+        if forced:
+            metrics.increment('connections_force_closed', forced)
+        if index_watcher is not None:
+            index_watcher.stop()
+            index_watcher = None
+        _restore_signal_handlers(previous_handlers)
 
 
-if __name__ == '__main__':
+def main() -> None:
+    """
+    Command line entry point for the server.
+
+    Returns:
+        None
+    """
+    configure_from_args('Serve string lookups over a socket.')
     start_server()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+This module provides the configuration shared by the server and client.
+
+Settings are read from 'config.ini' (or the file named by WEBSERVER_CONFIG)
+the first time they are needed rather than at import time, so importing
+the server or client modules performs no file or DNS lookups. Values are
+taken, in order of precedence, from command line arguments, environment
+variables, the configuration file and finally built-in defaults.
+"""
+import configparser
+import os
+import socket
+import threading
+from typing import List, NamedTuple, Optional
+
+DEFAULT_CONFIG_PATH = 'config.ini'
+DEFAULT_PORT = 12345
+
+# Environment variables that override the configuration file
+CONFIG_ENV = 'WEBSERVER_CONFIG'
+HOST_ENV = 'WEBSERVER_HOST'
+PORT_ENV = 'WEBSERVER_PORT'
+UNIX_SOCKET_ENV = 'WEBSERVER_UNIX_SOCKET'
+
+
+class Settings(NamedTuple):
+    """
+    Resolved configuration for the server and client.
+
+    Attributes:
+        host (str): Address the server binds to and the client connects to.
+        port (int): TCP port the server binds to and the client connects to.
+        unix_socket_path (str): Unix domain socket the server also listens
+            on, and the client prefers when it exists; empty to disable.
+        unix_socket_mode (int): Permission bits of the Unix domain socket.
+        linuxpath (str): Path of the file the server searches.
+        sslcert (str): Path of the SSL certificate.
+        sslkey (str): Path of the SSL private key.
+        server_ssl (bool): Whether the server wraps connections in SSL.
+        client_ssl (bool): Whether the client connects with SSL.
+        reread_on_query (bool): Whether the server rereads the file for
+            every query.
+        watch_file (bool): Whether a background thread rebuilds the index
+            when the file changes; takes precedence over reread_on_query.
+        watch_interval (float): Seconds between file checks when no
+            change notification arrives.
+        idle_timeout (float): Seconds a connection may idle between
+            queries, 0 for no limit.
+        query_timeout (float): Seconds a new connection has to send its
+            first query, 0 for no limit.
+        max_connections (int): Maximum open connections, 0 for no limit.
+        max_connections_per_ip (int): Maximum open connections per client
+            IP address, 0 for no limit.
+        drain_timeout (float): Seconds in-flight queries have to finish on
+            shutdown before their connections are closed.
+        restart_timeout (float): Seconds a replacement process has to
+            become ready during a hot restart.
+        metrics_interval (float): Seconds between metrics log lines, 0 to
+            log them only on shutdown.
+        config (Optional[configparser.ConfigParser]): The parsed
+            configuration file, for sections read by other modules; None
+            when the settings were not loaded from a file.
+    """
+
+    host: str = '127.0.0.1'
+    port: int = DEFAULT_PORT
+    unix_socket_path: str = ''
+    unix_socket_mode: int = 0o660
+    linuxpath: str = ''
+    sslcert: str = ''
+    sslkey: str = ''
+    server_ssl: bool = False
+    client_ssl: bool = False
+    reread_on_query: bool = False
+    watch_file: bool = False
+    watch_interval: float = 1.0
+    idle_timeout: float = 300.0
+    query_timeout: float = 5.0
+    max_connections: int = 256
+    max_connections_per_ip: int = 16
+    drain_timeout: float = 30.0
+    restart_timeout: float = 60.0
+    metrics_interval: float = 60.0
+    config: Optional[configparser.ConfigParser] = None
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def load_settings(config_path: Optional[str] = None,
+                  host: Optional[str] = None,
+                  port: Optional[int] = None) -> Settings:
+    """
+    Read the configuration file and environment into a Settings object.
+
+    Args:
+        config_path (Optional[str]): Configuration file to read; defaults
+            to WEBSERVER_CONFIG or 'config.ini'.
+        host (Optional[str]): Host overriding the environment and file.
+        port (Optional[int]): Port overriding the environment and file.
+
+    Returns:
+        Settings: The resolved settings.
+    """
+    config = configparser.ConfigParser()
+    if not config_path:
+        config_path = os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH
+    config.read(config_path)
+    defaults = Settings()
+
+    if host is None:
+        host = (os.environ.get(HOST_ENV)
+                or config.get('Server', 'host', fallback=None))
+    if host is None:
+        # Only resolve our own address when no host was configured
+        host = socket.gethostbyname(socket.gethostname())
+    if port is None:
+        port_value = (os.environ.get(PORT_ENV)
+                      or config.get('Server', 'port', fallback=None))
+        port = int(port_value) if port_value else defaults.port
+
+    unix_socket_path = (os.environ.get(UNIX_SOCKET_ENV)
+                        or config.get('Server', 'unix_socket_path',
+                                      fallback=None)
+                        or defaults.unix_socket_path)
+
+    return Settings(
+        host=host,
+        port=port,
+        unix_socket_path=unix_socket_path,
+        unix_socket_mode=int(config.get(
+            'Server', 'unix_socket_mode',
+            fallback=oct(defaults.unix_socket_mode)), 8),
+        linuxpath=config.get('Server', 'linuxpath',
+                             fallback=defaults.linuxpath),
+        sslcert=config.get('Server', 'sslcert', fallback=defaults.sslcert),
+        sslkey=config.get('Server', 'sslkey', fallback=defaults.sslkey),
+        server_ssl=config.getboolean('Server', 'ssl',
+                                     fallback=defaults.server_ssl),
+        client_ssl=config.getboolean('Client', 'ssl',
+                                     fallback=defaults.client_ssl),
+        reread_on_query=config.getboolean(
+            'Server', 'REREAD_ON_QUERY', fallback=defaults.reread_on_query),
+        watch_file=config.getboolean('Server', 'WATCH_FILE',
+                                     fallback=defaults.watch_file),
+        watch_interval=config.getfloat('Server', 'watch_interval',
+                                       fallback=defaults.watch_interval),
+        idle_timeout=config.getfloat('Server', 'idle_timeout',
+                                     fallback=defaults.idle_timeout),
+        query_timeout=config.getfloat('Server', 'query_timeout',
+                                      fallback=defaults.query_timeout),
+        max_connections=config.getint('Server', 'max_connections',
+                                      fallback=defaults.max_connections),
+        max_connections_per_ip=config.getint(
+            'Server', 'max_connections_per_ip',
+            fallback=defaults.max_connections_per_ip),
+        drain_timeout=config.getfloat('Server', 'drain_timeout',
+                                      fallback=defaults.drain_timeout),
+        restart_timeout=config.getfloat('Server', 'restart_timeout',
+                                        fallback=defaults.restart_timeout),
+        metrics_interval=config.getfloat('Server', 'metrics_interval',
+                                         fallback=defaults.metrics_interval),
+        config=config,
+    )
+
+
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, loading them on first use.
+
+    Returns:
+        Settings: The cached settings.
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def configure(settings: Optional[Settings]) -> None:
+    """
+    Replace the process-wide settings.
+
+    Args:
+        settings (Optional[Settings]): The settings to use, or None to
+            load them again from the configuration file on next use.
+
+    Returns:
+        None
+    """
+    global _settings
+    with _settings_lock:
+        _settings = settings
+
+
+def configure_from_args(description: str,
+                        argv: Optional[List[str]] = None) -> Settings:
+    """
+    Parse the common command line options and install the resulting settings.
+
+    Args:
+        description (str): Description shown in the command's help text.
+        argv (Optional[List[str]]): Arguments to parse; defaults to
+            sys.argv.
+
+    Returns:
+        Settings: The settings now in use.
+    """
+    # Imported here so that library users do not pay for it on import
+    import argparse
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--config', help='path of the configuration file '
+                        f'(default: ${CONFIG_ENV} or {DEFAULT_CONFIG_PATH})')
+    parser.add_argument('--host', help='server host address '
+                        f'(default: ${HOST_ENV} or [Server] host)')
+    parser.add_argument('--port', type=int, help='server port '
+                        f'(default: ${PORT_ENV} or [Server] port)')
+    args = parser.parse_args(argv)
+    settings = load_settings(args.config, args.host, args.port)
+    configure(settings)
+    return settings
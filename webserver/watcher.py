@@ -0,0 +1,257 @@
+"""
+This module provides a background watcher that rebuilds the server's
+search index when the indexed file changes.
+
+The watcher waits for inotify events on Linux, falling back to polling
+the file's status on other platforms. A new index is built off the
+request path and published by replacing a single reference, so queries
+always see either the old or the new index in full.
+"""
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from webserver.metrics import ServerMetrics
+
+Index = Dict[str, List[int]]
+FileSignature = Tuple[int, int, int]
+
+# inotify event mask: file written and closed, replaced, created or removed
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+class _Inotify:
+    """
+    Minimal inotify binding watching one directory.
+
+    Args:
+        directory (str): Directory to watch.
+
+    Raises:
+        OSError: If inotify is unavailable or the watch cannot be added.
+    """
+
+    def __init__(self, directory: str) -> None:
+        # Imported here so that servers polling for changes, and importers
+        # of the server module, do not pay for it
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory),
+                                  _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {directory}')
+        # Written to by 'interrupt' to end a wait early
+        self._wakeup_read, self._wakeup_write = os.pipe()
+
+    def wait(self, timeout: float) -> None:
+        """
+        Wait until an event arrives, 'interrupt' is called or the timeout
+        expires, then drain events.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            None
+        """
+        readable, _, _ = select.select([self.fd, self._wakeup_read], [], [],
+                                       timeout)
+        if self.fd in readable:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def interrupt(self) -> None:
+        """
+        Make the current or next 'wait' return immediately.
+
+        Returns:
+            None
+        """
+        os.write(self._wakeup_write, b'1')
+
+    def close(self) -> None:
+        """
+        Release the inotify file descriptor.
+
+        Returns:
+            None
+        """
+        os.close(self.fd)
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+
+
+class IndexWatcher:
+    """
+    Keeps an index of a file up to date from a background thread.
+
+    Args:
+        path (str): File to index.
+        loader (Callable[[str], Index]): Function building the index of
+            a file, such as 'server.read_file'.
+        interval (float): Seconds between status checks when no change
+            notification arrives.
+        metrics (Optional[ServerMetrics]): Where to record reload
+            duration, staleness and failures.
+        use_inotify (bool): Whether to try inotify before polling.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Index],
+                 interval: float = 1.0,
+                 metrics: Optional[ServerMetrics] = None,
+                 use_inotify: bool = True) -> None:
+        self.path = path
+        self.loader = loader
+        self.interval = interval
+        self.metrics = metrics
+        self.use_inotify = use_inotify
+        # Replaced as a whole on reload; readers take the reference once
+        self.index: Index = {}
+        self._signature: Optional[FileSignature] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    def _file_signature(self) -> Tuple[FileSignature, float]:
+        """
+        Return what identifies the current file contents, and its mtime.
+
+        Returns:
+            Tuple[FileSignature, float]: Inode, size and modification time
+            in nanoseconds, and the modification time in seconds.
+
+        Raises:
+            OSError: If the file cannot be accessed.
+        """
+        status = os.stat(self.path)
+        return ((status.st_ino, status.st_size, status.st_mtime_ns),
+                status.st_mtime)
+
+    def reload(self) -> float:
+        """
+        Build the index of the file and publish it.
+
+        Returns:
+            float: Modification time of the loaded file, in seconds.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        signature, modified = self._file_signature()
+        start_time = time.monotonic()
+        index = self.loader(self.path)
+        duration = time.monotonic() - start_time
+        self.index = index
+        self._signature = signature
+        if self.metrics is not None:
+            self.metrics.increment('index_reloads')
+            self.metrics.set_gauge('index_reload_seconds', duration)
+        return modified
+
+    def check(self) -> bool:
+        """
+        Reload the index if the file changed since it was last loaded.
+
+        Failures are counted and leave the current index in place.
+
+        Returns:
+            bool: True if a new index was published.
+        """
+        try:
+            signature, _ = self._file_signature()
+            if signature == self._signature:
+                return False
+            modified = self.reload()
+        except (OSError, UnicodeDecodeError) as reload_error:
+            print(f'Error reloading {self.path}: {reload_error}')
+            if self.metrics is not None:
+                self.metrics.increment('index_reload_errors')
+            return False
+        if self.metrics is not None:
+            # How long the file had changed before queries could see it;
+            # not recorded for the initial load, where it is the file's age
+            self.metrics.set_gauge('index_staleness_seconds',
+                                   max(0.0, time.time() - modified))
+        return True
+
+    def start(self) -> None:
+        """
+        Load the index and start watching the file in the background.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the initial load fails.
+        """
+        # Watch before loading so that no change after the load is missed
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify(os.path.dirname(self.path) or '.')
+            except (OSError, AttributeError, TypeError):
+                self._inotify = None
+        try:
+            self.reload()
+        except (OSError, UnicodeDecodeError):
+            self._close_inotify()
+            raise
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='index-watcher')
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and wait for it to finish.
+
+        Returns:
+            None
+        """
+        self._stop.set()
+        if self._inotify is not None:
+            self._inotify.interrupt()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_inotify()
+
+    def _close_inotify(self) -> None:
+        """
+        Release the inotify watch, if any.
+
+        Returns:
+            None
+        """
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self) -> None:
+        """
+        Watch for changes until 'stop' is called.
+
+        Returns:
+            None
+        """
+        inotify = self._inotify
+        while not self._stop.is_set():
+            if inotify is not None:
+                inotify.wait(self.interval)
+            else:
+                self._stop.wait(self.interval)
+            if not self._stop.is_set():
+                self.check()